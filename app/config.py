@@ -25,6 +25,74 @@ class Settings(BaseSettings):
     # CORS settings (defined as Union to prevent automatic JSON parsing)
     CORS_ORIGINS: Union[str, List[str]] = ["http://localhost:3000"]
     
+    # Crawler settings
+    CRAWL_MAX_PAGES: int = 50
+    CRAWL_MAX_DEPTH: int = 3
+    CRAWL_CONCURRENCY: int = 8
+    CRAWL_REQUEST_TIMEOUT: int = 10
+    
+    # Shared HTTP client settings
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 8
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_KEEPALIVE_TIMEOUT: int = 30
+    
+    # Headless browser pool settings
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_MAX_PAGES_PER_INSTANCE: int = 50
+    BROWSER_PAGE_LOAD_TIMEOUT: int = 20
+    RENDER_SETTLE_TIMEOUT: float = 10.0
+    RENDER_QUIET_MS: int = 500
+    RENDER_MAX_INFLIGHT_REQUESTS: int = 2
+    
+    # Render blocking profile (comma-separated): types from image, font, media, analytics
+    RENDER_BLOCKED_RESOURCE_TYPES: str = "image,font,media,analytics"
+    RENDER_BLOCKED_DOMAINS: str = ""
+    
+    # Page fetch settings ("tiered", "static" or "render")
+    FETCH_MODE: str = "tiered"
+    STATIC_MIN_TEXT_CHARS: int = 200
+    
+    # HTML parsing ("html.parser", "lxml" or "auto" to prefer lxml when installed).
+    # lxml is faster but attributes text differently on mis-nested markup, so it is opt-in
+    HTML_PARSER_BACKEND: str = "html.parser"
+    # Page text extraction ("all" content text or "main" to drop nav/header/footer boilerplate)
+    CONTENT_EXTRACTION_MODE: str = "all"
+    # Where parsing runs: "thread" (default executor) or "process" (worker pool, 0 = one per core)
+    PARSE_EXECUTOR: str = "thread"
+    PARSE_PROCESS_WORKERS: int = 0
+    PARSE_MAX_PENDING: int = 32
+    
+    # Streaming extraction for very large pages (0 disables); caps on what is kept per page
+    STREAMING_PARSE_THRESHOLD_CHARS: int = 2_000_000
+    STREAM_CHUNK_SIZE: int = 65536
+    STREAM_MAX_CONTENT_CHARS: int = 200_000
+    STREAM_MAX_LINKS: int = 2000
+    STREAM_MAX_IMAGES: int = 1000
+    STREAM_MAX_HEADINGS: int = 500
+    STREAM_MAX_FIELD_CHARS: int = 2000
+    STREAM_MAX_OPEN_ELEMENTS: int = 512
+    
+    # Scan pipeline settings
+    SCAN_FETCH_WORKERS: int = 4
+    SCAN_PARSE_WORKERS: int = 2
+    SCAN_PARSE_BATCH_SIZE: int = 8
+    SCAN_STORE_WORKERS: int = 1
+    SCAN_QUEUE_SIZE: int = 16
+    SCAN_HOST_MAX_CONCURRENCY: int = 4
+    SCAN_HOST_MIN_INTERVAL: float = 0.1
+    SCAN_PROGRESS_FLUSH_INTERVAL: float = 2.0
+    SCAN_PROGRESS_FLUSH_PAGES: int = 10
+    
+    # Batched MongoDB writes
+    MONGO_BULK_BATCH_SIZE: int = 200
+    MONGO_BULK_FLUSH_INTERVAL: float = 1.0
+    
+    # Snapshot comparison results kept in memory in front of the stored cache,
+    # bounded by entry count and by approximate (BSON-encoded) size per worker
+    COMPARISON_CACHE_SIZE: int = 256
+    COMPARISON_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    
     # Validate MongoDB connection string
     @validator("MONGODB_URL")
     def validate_mongo_url(cls, v):
@@ -8,21 +8,138 @@ Focused on detecting and analyzing differences between snapshots.
 from fastapi import HTTPException, status, Request
 from ...database import db
 from ...models.website import (
-    SnapshotComparison, ComparisonRequest, PyObjectId
+    SnapshotComparison, ComparisonRequest, ComparisonChangeKind, PageView, ScanStatus, PyObjectId
 )
 from .website_controller import WebsiteController
 from .snapshot_controller import SnapshotController
+from ...config import settings
+from ...db.bulk_writer import BulkWriter
+from pymongo import InsertOne
+import bson
+from pymongo.errors import DuplicateKeyError
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pages fetched per cursor round-trip while streaming a comparison
+COMPARISON_CURSOR_BATCH_SIZE = 500
+
+# Page and insight changes kept inline on the comparison document; the full
+# lists are stored one change per document in comparison_changes
+COMPARISON_CHANGES_PREVIEW = 100
+
+# Bump whenever _run_comparison's output changes, so cached results are recomputed
+COMPARISON_ALGORITHM_VERSION = 2
+
+# Page fields the diff reads, by the page fingerprint that covers them
+FINGERPRINTED_DIFF_FIELDS = {
+    "title": ("title",),
+    "meta": ("meta_description",),
+    "headings": ("h1_tags",),
+    "insights": ("insights",)
+}
+
+def _changed_fields(baseline_page: Dict[str, Any], current_page: Dict[str, Any]) -> set:
+    """Page fields to load for a page present in both snapshots"""
+    baseline_prints = baseline_page.get("fingerprints") or {}
+    current_prints = current_page.get("fingerprints") or {}
+    content_changed = baseline_page.get("content_hash") != current_page.get("content_hash")
+    
+    fields = set()
+    for name, page_fields in FINGERPRINTED_DIFF_FIELDS.items():
+        # Pages stored before fingerprints existed have none; load their fields
+        differs = (
+            name not in baseline_prints
+            or name not in current_prints
+            or baseline_prints[name] != current_prints[name]
+        )
+        # Page field details are only reported for modified pages; insights always
+        if differs and (content_changed or name == "insights"):
+            fields.update(page_fields)
+    return fields
+
+# In-process LRU of final comparison documents with their encoded size, keyed like the unique index
+_comparison_cache: "OrderedDict[Tuple[str, str, int], Tuple[Dict[str, Any], int]]" = OrderedDict()
+_comparison_cache_bytes = 0
+
+def _cache_get(key: Tuple[str, str, int]) -> Optional[Dict[str, Any]]:
+    entry = _comparison_cache.get(key)
+    if entry is None:
+        return None
+    _comparison_cache.move_to_end(key)
+    return entry[0]
+
+def _cache_put(key: Tuple[str, str, int], comparison: Dict[str, Any]):
+    """Cache a comparison, evicting least recently used ones past the entry or byte budget"""
+    global _comparison_cache_bytes
+    
+    # BSON size approximates the in-memory footprint closely enough for a budget
+    size = len(bson.encode(comparison))
+    if size > settings.COMPARISON_CACHE_MAX_BYTES:
+        return
+    
+    previous = _comparison_cache.pop(key, None)
+    if previous is not None:
+        _comparison_cache_bytes -= previous[1]
+    _comparison_cache[key] = (comparison, size)
+    _comparison_cache_bytes += size
+    
+    while (
+        len(_comparison_cache) > settings.COMPARISON_CACHE_SIZE
+        or _comparison_cache_bytes > settings.COMPARISON_CACHE_MAX_BYTES
+    ):
+        _, (_, evicted_size) = _comparison_cache.popitem(last=False)
+        _comparison_cache_bytes -= evicted_size
+
+async def _next_page(cursor) -> Optional[Dict[str, Any]]:
+    """Next page from a cursor, or None once it is exhausted"""
+    try:
+        page = await cursor.__anext__()
+    except StopAsyncIteration:
+        return None
+    # Missing URLs sort first in MongoDB; compare them as empty strings here
+    if not isinstance(page.get("url"), str):
+        page["url"] = ""
+    return page
+
+async def _merge_join_by_url(baseline_cursor, current_cursor):
+    """
+    Merge-join two URL-sorted page cursors.
+    
+    Yields (url, baseline_page, current_page) in URL order, with None on the
+    side where the URL does not exist.
+    """
+    baseline = await _next_page(baseline_cursor)
+    current = await _next_page(current_cursor)
+    
+    while baseline is not None or current is not None:
+        if current is None or (baseline is not None and baseline["url"] < current["url"]):
+            url, pair = baseline["url"], (baseline, None)
+        elif baseline is None or current["url"] < baseline["url"]:
+            url, pair = current["url"], (None, current)
+        else:
+            url, pair = baseline["url"], (baseline, current)
+        
+        yield url, pair[0], pair[1]
+        
+        # Advance every side that was consumed, skipping duplicate URLs
+        if pair[0] is not None:
+            while baseline is not None and baseline["url"] == url:
+                baseline = await _next_page(baseline_cursor)
+        if pair[1] is not None:
+            while current is not None and current["url"] == url:
+                current = await _next_page(current_cursor)
+
 class ComparisonController:
     """Controller for snapshot comparison operations"""
     
     def __init__(self):
         self.comparisons_collection = db.snapshot_comparisons
+        self.changes_collection = db.comparison_changes
+        self.pages_collection = db.page_snapshots
         self.website_controller = WebsiteController()
         self.snapshot_controller = SnapshotController()
         
@@ -33,95 +150,20 @@ class ComparisonController:
             # Verify user owns the website
             await self.website_controller.get_website(request, comparison_request.website_id)
             
-            # Get both snapshots
+            # Verify both snapshots exist and belong to the user
             baseline = await self.snapshot_controller.get_snapshot(request, comparison_request.baseline_snapshot_id)
             current = await self.snapshot_controller.get_snapshot(request, comparison_request.current_snapshot_id)
             
-            # Get pages for both snapshots
-            baseline_pages = await self.snapshot_controller.get_snapshot_pages(
-                request, comparison_request.baseline_snapshot_id
-            )
-            current_pages = await self.snapshot_controller.get_snapshot_pages(
-                request, comparison_request.current_snapshot_id
+            comparison_doc = await self._run_comparison(
+                comparison_request.website_id,
+                user_id,
+                comparison_request.baseline_snapshot_id,
+                comparison_request.current_snapshot_id,
+                final=(
+                    baseline.scan_status == ScanStatus.COMPLETED
+                    and current.scan_status == ScanStatus.COMPLETED
+                )
             )
-            
-            # Create URL maps for comparison
-            baseline_urls = {page["url"]: page for page in baseline_pages}
-            current_urls = {page["url"]: page for page in current_pages}
-            
-            # Calculate changes
-            all_urls = set(baseline_urls.keys()) | set(current_urls.keys())
-            pages_added = len(current_urls.keys() - baseline_urls.keys())
-            pages_removed = len(baseline_urls.keys() - current_urls.keys())
-            pages_modified = 0
-            
-            page_changes = []
-            insight_changes = []
-            seo_improvements = 0
-            seo_regressions = 0
-            
-            for url in all_urls:
-                baseline_page = baseline_urls.get(url)
-                current_page = current_urls.get(url)
-                
-                if baseline_page and current_page:
-                    # Check if page content changed
-                    if baseline_page.get("content_hash") != current_page.get("content_hash"):
-                        pages_modified += 1
-                        page_changes.append({
-                            "url": url,
-                            "change_type": "modified",
-                            "changes": self._detect_page_changes(baseline_page, current_page)
-                        })
-                    
-                    # Check insight changes
-                    insight_change = self._detect_insight_changes(baseline_page, current_page)
-                    if insight_change:
-                        insight_changes.append(insight_change)
-                        
-                        # Count improvements/regressions
-                        for category, changes in insight_change["changes"].items():
-                            if category == "Immediate Action Required":
-                                seo_improvements += len(changes.get("removed", []))
-                                seo_regressions += len(changes.get("added", []))
-                            elif category == "Needs Attention":
-                                seo_improvements += len(changes.get("removed", []))
-                                seo_regressions += len(changes.get("added", []))
-                        
-                elif current_page:
-                    page_changes.append({
-                        "url": url,
-                        "change_type": "added"
-                    })
-                else:
-                    page_changes.append({
-                        "url": url,
-                        "change_type": "removed"
-                    })
-            
-            # Create comparison document
-            comparison_doc = {
-                "website_id": PyObjectId(comparison_request.website_id),
-                "user_id": user_id,
-                "baseline_snapshot_id": PyObjectId(comparison_request.baseline_snapshot_id),
-                "current_snapshot_id": PyObjectId(comparison_request.current_snapshot_id),
-                "pages_added": pages_added,
-                "pages_removed": pages_removed,
-                "pages_modified": pages_modified,
-                "seo_improvements": seo_improvements,
-                "seo_regressions": seo_regressions,
-                "new_issues": seo_regressions,
-                "resolved_issues": seo_improvements,
-                "page_changes": page_changes,
-                "insight_changes": insight_changes,
-                "created_at": datetime.utcnow()
-            }
-            
-            result = await self.comparisons_collection.insert_one(comparison_doc)
-            comparison_doc["_id"] = result.inserted_id
-            
-            logger.info(f"Created comparison between snapshots {comparison_request.baseline_snapshot_id} and {comparison_request.current_snapshot_id}")
-            
             return SnapshotComparison(**comparison_doc)
             
         except HTTPException:
@@ -133,6 +175,225 @@ class ComparisonController:
                 detail="Failed to compare snapshots"
             )
     
+    async def _run_comparison(
+        self,
+        website_id: str,
+        user_id: str,
+        baseline_snapshot_id: str,
+        current_snapshot_id: str,
+        final: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Compare two snapshots and store the result. Callers check ownership.
+        
+        Both snapshots' pages are streamed in URL order and merge-joined, so only
+        one page per side is held in memory regardless of site size. Per-page
+        changes are written to comparison_changes in batches as they are found;
+        the comparison document keeps the counts and the first
+        COMPARISON_CHANGES_PREVIEW changes of each kind, so it stays far below
+        MongoDB's 16 MB document limit however many pages changed.
+        
+        Completed snapshots never change, so when both are completed (final) the
+        result is memoized per (baseline, current, COMPARISON_ALGORITHM_VERSION):
+        first in this process's LRU, then in snapshot_comparisons under a unique
+        index. Repeat requests return the stored result without re-diffing.
+        """
+        cache_key = (baseline_snapshot_id, current_snapshot_id, COMPARISON_ALGORITHM_VERSION)
+        if final:
+            cached = await self._find_cached_comparison(cache_key)
+            if cached:
+                return cached
+        
+        comparison_id = PyObjectId()
+        
+        pages_added = 0
+        pages_removed = 0
+        pages_modified = 0
+        
+        page_changes = []
+        insight_changes = []
+        totals = {ComparisonChangeKind.PAGE: 0, ComparisonChangeKind.INSIGHT: 0}
+        seo_improvements = 0
+        seo_regressions = 0
+        
+        writer = BulkWriter(
+            self.changes_collection,
+            batch_size=settings.MONGO_BULK_BATCH_SIZE,
+            flush_interval=settings.MONGO_BULK_FLUSH_INTERVAL
+        )
+        
+        async def add_change(kind: ComparisonChangeKind, preview: List[Dict[str, Any]], change: Dict[str, Any]):
+            totals[kind] += 1
+            if len(preview) < COMPARISON_CHANGES_PREVIEW:
+                preview.append(change)
+            await writer.add(
+                InsertOne({"comparison_id": comparison_id, "kind": kind.value, **change}),
+                key=change.get("url")
+            )
+        
+        async def record(url: str, baseline_page: Optional[Dict], current_page: Optional[Dict]):
+            nonlocal pages_added, pages_removed, pages_modified, seo_improvements, seo_regressions
+            
+            if baseline_page and current_page:
+                # Check if page content changed
+                if baseline_page.get("content_hash") != current_page.get("content_hash"):
+                    pages_modified += 1
+                    await add_change(ComparisonChangeKind.PAGE, page_changes, {
+                        "url": url,
+                        "change_type": "modified",
+                        "changes": self._detect_page_changes(baseline_page, current_page)
+                    })
+                
+                # Check insight changes
+                insight_change = self._detect_insight_changes(baseline_page, current_page)
+                if insight_change:
+                    await add_change(ComparisonChangeKind.INSIGHT, insight_changes, insight_change)
+                    
+                    # Count improvements/regressions
+                    for category, changes in insight_change["changes"].items():
+                        if category in ("Immediate Action Required", "Needs Attention"):
+                            seo_improvements += len(changes.get("removed", []))
+                            seo_regressions += len(changes.get("added", []))
+                    
+            elif current_page:
+                pages_added += 1
+                await add_change(ComparisonChangeKind.PAGE, page_changes, {
+                    "url": url,
+                    "change_type": "added"
+                })
+            else:
+                pages_removed += 1
+                await add_change(ComparisonChangeKind.PAGE, page_changes, {
+                    "url": url,
+                    "change_type": "removed"
+                })
+        
+        # Pages arrive with fingerprints only; fields are loaded per batch where they differ
+        baseline_cursor = self.snapshot_controller.iter_snapshot_pages(
+            baseline_snapshot_id, PageView.DIFF
+        ).batch_size(COMPARISON_CURSOR_BATCH_SIZE)
+        current_cursor = self.snapshot_controller.iter_snapshot_pages(
+            current_snapshot_id, PageView.DIFF
+        ).batch_size(COMPARISON_CURSOR_BATCH_SIZE)
+        
+        try:
+            async with writer:
+                pending = []
+                async for joined in _merge_join_by_url(baseline_cursor, current_cursor):
+                    pending.append(joined)
+                    if len(pending) >= COMPARISON_CURSOR_BATCH_SIZE:
+                        await self._load_changed_fields(pending)
+                        for url, baseline_page, current_page in pending:
+                            await record(url, baseline_page, current_page)
+                        pending = []
+                
+                await self._load_changed_fields(pending)
+                for url, baseline_page, current_page in pending:
+                    await record(url, baseline_page, current_page)
+            
+            if writer.failed:
+                raise RuntimeError(f"{writer.failed} comparison changes could not be stored")
+        except Exception:
+            await self._discard_changes(comparison_id)
+            raise
+        
+        # Create comparison document
+        comparison_doc = {
+            "_id": comparison_id,
+            "website_id": PyObjectId(website_id),
+            "user_id": user_id,
+            "baseline_snapshot_id": PyObjectId(baseline_snapshot_id),
+            "current_snapshot_id": PyObjectId(current_snapshot_id),
+            "pages_added": pages_added,
+            "pages_removed": pages_removed,
+            "pages_modified": pages_modified,
+            "seo_improvements": seo_improvements,
+            "seo_regressions": seo_regressions,
+            "new_issues": seo_regressions,
+            "resolved_issues": seo_improvements,
+            "page_changes": page_changes,
+            "insight_changes": insight_changes,
+            "page_changes_total": totals[ComparisonChangeKind.PAGE],
+            "insight_changes_total": totals[ComparisonChangeKind.INSIGHT],
+            "algorithm_version": COMPARISON_ALGORITHM_VERSION,
+            "final": final,
+            "created_at": datetime.utcnow()
+        }
+        
+        try:
+            await self.comparisons_collection.insert_one(comparison_doc)
+        except DuplicateKeyError:
+            # A concurrent request stored the same pair first; return its result
+            await self._discard_changes(comparison_id)
+            stored = await self._find_cached_comparison(cache_key)
+            if stored:
+                return stored
+            raise
+        except Exception:
+            await self._discard_changes(comparison_id)
+            raise
+        
+        if final:
+            _cache_put(cache_key, comparison_doc)
+        
+        logger.info(f"Created comparison between snapshots {baseline_snapshot_id} and {current_snapshot_id}")
+        return comparison_doc
+    
+    async def _discard_changes(self, comparison_id: PyObjectId):
+        """Remove the stored changes of a comparison that was not kept"""
+        try:
+            await self.changes_collection.delete_many({"comparison_id": comparison_id})
+        except Exception as e:
+            logger.error(f"Failed to remove changes of discarded comparison {comparison_id}: {str(e)}")
+    
+    async def _load_changed_fields(self, pairs: List[Tuple[str, Optional[Dict], Optional[Dict]]]):
+        """
+        Load the page fields the diff needs for pages present in both snapshots,
+        skipping fields whose fingerprints match. Fields are merged into the pages.
+        """
+        baseline_ids = []
+        current_ids = []
+        fields = set()
+        for _, baseline_page, current_page in pairs:
+            if not (baseline_page and current_page):
+                continue
+            changed = _changed_fields(baseline_page, current_page)
+            if changed:
+                fields |= changed
+                baseline_ids.append(baseline_page["_id"])
+                current_ids.append(current_page["_id"])
+        
+        if not fields:
+            return
+        
+        projection = {field: 1 for field in fields}
+        loaded = {}
+        for ids in (baseline_ids, current_ids):
+            async for page in self.pages_collection.find({"_id": {"$in": ids}}, projection):
+                loaded[page["_id"]] = page
+        
+        for _, baseline_page, current_page in pairs:
+            if baseline_page and current_page:
+                baseline_page.update(loaded.get(baseline_page["_id"], {}))
+                current_page.update(loaded.get(current_page["_id"], {}))
+    
+    async def _find_cached_comparison(self, cache_key: Tuple[str, str, int]) -> Optional[Dict[str, Any]]:
+        """Stored final comparison for a snapshot pair, from the LRU or the database"""
+        cached = _cache_get(cache_key)
+        if cached:
+            return cached
+        
+        baseline_snapshot_id, current_snapshot_id, algorithm_version = cache_key
+        stored = await self.comparisons_collection.find_one({
+            "baseline_snapshot_id": PyObjectId(baseline_snapshot_id),
+            "current_snapshot_id": PyObjectId(current_snapshot_id),
+            "algorithm_version": algorithm_version,
+            "final": True
+        })
+        if stored:
+            _cache_put(cache_key, stored)
+        return stored
+    
     async def get_comparison(self, request: Request, comparison_id: str) -> SnapshotComparison:
         """Get a specific comparison by ID"""
         try:
@@ -159,6 +420,90 @@ class ComparisonController:
                 detail="Failed to retrieve comparison"
             )
     
+    async def get_comparison_changes(
+        self,
+        request: Request,
+        comparison_id: str,
+        kind: ComparisonChangeKind = ComparisonChangeKind.PAGE,
+        skip: int = 0,
+        limit: int = COMPARISON_CHANGES_PREVIEW
+    ) -> Dict[str, Any]:
+        """Page through the full page or insight change list of a comparison, in URL order"""
+        try:
+            user_id = request.state.user["id"]
+            comparison = await self.comparisons_collection.find_one(
+                {"_id": PyObjectId(comparison_id), "user_id": user_id},
+                {"page_changes": 1, "insight_changes": 1, "page_changes_total": 1, "insight_changes_total": 1}
+            )
+            
+            if not comparison:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Comparison not found"
+                )
+            
+            kind = ComparisonChangeKind(kind)
+            inline_key = "page_changes" if kind == ComparisonChangeKind.PAGE else "insight_changes"
+            total = comparison.get(f"{inline_key}_total")
+            
+            if total is None:
+                # Stored before changes moved to their own collection: the inline list is complete
+                changes = comparison.get(inline_key, [])
+                return {"changes": changes[skip:skip + limit], "total": len(changes), "skip": skip, "limit": limit}
+            
+            cursor = self.changes_collection.find(
+                {"comparison_id": comparison["_id"], "kind": kind.value},
+                {"_id": 0, "comparison_id": 0, "kind": 0}
+            ).sort("url", 1).skip(skip).limit(limit)
+            
+            return {"changes": await cursor.to_list(length=None), "total": total, "skip": skip, "limit": limit}
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting comparison changes: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve comparison changes"
+            )
+    
+    async def get_latest_comparison(self, request: Request, website_id: str) -> SnapshotComparison:
+        """
+        Most recent stored comparison for a website: the newest current snapshot,
+        against its closest baseline. Comparisons against the previous version are
+        stored when a scan completes, so this is a single indexed read.
+        """
+        try:
+            user_id = request.state.user["id"]
+            # Verify user owns the website
+            await self.website_controller.get_website(request, website_id)
+            
+            comparison = await self.comparisons_collection.find_one(
+                {
+                    "website_id": PyObjectId(website_id),
+                    "user_id": user_id,
+                    "final": True
+                },
+                sort=[("current_snapshot_id", -1), ("baseline_snapshot_id", -1)]
+            )
+            
+            if not comparison:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No comparison available yet"
+                )
+                
+            return SnapshotComparison(**comparison)
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error getting latest comparison: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to retrieve latest comparison"
+            )
+    
     async def get_website_comparisons(self, request: Request, website_id: str, limit: int = 10) -> List[SnapshotComparison]:
         """Get comparisons for a website"""
         try:
@@ -9,18 +9,50 @@ from fastapi import HTTPException, status, Request
 from ...database import db
 from ...models.website import (
     WebsiteSnapshot, PageSnapshot, SnapshotCreateRequest,
-    ScanStatus, PyObjectId
+    ScanStatus, PageView, PyObjectId
 )
 from .website_controller import WebsiteController
+from ...config import settings
+from ...db.bulk_writer import BulkWriter
+from ...scrape.page_extract import PageExtract
+from pymongo import InsertOne
 from datetime import datetime
-from urllib.parse import urlparse
 from typing import List, Dict, Any
 import asyncio
 import logging
-import hashlib
 
 logger = logging.getLogger(__name__)
 
+# Keeps background comparison tasks referenced until they finish
+_background_comparisons = set()
+
+# Fields returned for each page view. The full view includes seo_data, the
+# embedded copy of the whole scraped page, which dominates document size.
+PAGE_PROJECTIONS = {
+    PageView.SUMMARY: {
+        "url": 1,
+        "url_path": 1,
+        "page_type": 1,
+        "title": 1,
+        "meta_description": 1,
+        "h1_tags": 1,
+        "h2_tags": 1,
+        "word_count": 1,
+        "status_code": 1,
+        "response_time_ms": 1,
+        "content_hash": 1,
+        "scraped_at": 1
+    },
+    # Individual fields are fetched by the comparison only where fingerprints differ
+    PageView.DIFF: {
+        "url": 1,
+        "content_hash": 1,
+        "word_count": 1,
+        "fingerprints": 1
+    },
+    PageView.FULL: None
+}
+
 class SnapshotController:
     """Controller for snapshot operations"""
     
@@ -51,6 +83,7 @@ class SnapshotController:
                 "version": next_version,
                 "scan_status": ScanStatus.PENDING.value,
                 "base_url": website.base_url,
+                "max_pages": create_request.max_pages or website.max_pages_per_crawl,
                 "pages_discovered": 0,
                 "pages_scraped": 0,
                 "pages_failed": 0,
@@ -134,17 +167,26 @@ class SnapshotController:
                 detail="Failed to retrieve snapshot"
             )
     
-    async def get_snapshot_pages(self, request: Request, snapshot_id: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get pages for a snapshot"""
+    async def get_snapshot_pages(
+        self,
+        request: Request,
+        snapshot_id: str,
+        limit: int = 50,
+        view: PageView = PageView.SUMMARY
+    ) -> List[Dict[str, Any]]:
+        """Get pages for a snapshot, limited to the fields of the requested view"""
         try:
             user_id = request.state.user["id"]
             # Verify user owns the snapshot
             await self.get_snapshot(request, snapshot_id)
             
-            cursor = self.pages_collection.find({
-                "snapshot_id": PyObjectId(snapshot_id),
-                "user_id": user_id
-            }).limit(limit)
+            cursor = self.pages_collection.find(
+                {
+                    "snapshot_id": PyObjectId(snapshot_id),
+                    "user_id": user_id
+                },
+                PAGE_PROJECTIONS[PageView(view)]
+            ).limit(limit)
             
             return await cursor.to_list(length=None)
             
@@ -157,6 +199,18 @@ class SnapshotController:
                 detail="Failed to retrieve snapshot pages"
             )
     
+    def iter_snapshot_pages(self, snapshot_id: str, view: PageView = PageView.SUMMARY):
+        """
+        Cursor over all of a snapshot's pages in URL order. Callers check ownership.
+        
+        Served by the (snapshot_id, url) index, so large snapshots are streamed
+        rather than sorted in memory.
+        """
+        return self.pages_collection.find(
+            {"snapshot_id": PyObjectId(snapshot_id)},
+            PAGE_PROJECTIONS[PageView(view)]
+        ).sort("url", 1)
+    
     async def _run_snapshot_scan(self, snapshot_id: str):
         """Background task to run the snapshot scan"""
         try:
@@ -168,17 +222,35 @@ class SnapshotController:
                 logger.error(f"Snapshot {snapshot_id} not found for scanning")
                 return
             
-            # Update status to crawling
-            await self._update_snapshot_status(snapshot_id, {
-                "scan_status": ScanStatus.CRAWLING.value,
-                "current_step": "Discovering pages"
-            })
+            # Pages unchanged since the last completed snapshot are not parsed again
+            previous_query = {
+                "website_id": snapshot["website_id"],
+                "scan_status": ScanStatus.COMPLETED.value,
+                "_id": {"$ne": snapshot["_id"]}
+            }
+            if snapshot.get("version") is not None:
+                previous_query["version"] = {"$lt": snapshot["version"]}
+            previous = await self.snapshots_collection.find_one(
+                previous_query,
+                {"_id": 1},
+                sort=[("version", -1)]
+            )
             
-            # Run the scan (reuse existing crawling logic)
-            scan_result = await complete_scan(snapshot_id, snapshot["base_url"])
+            # Run the scan (reuse existing crawling logic); progress lands on the snapshot in batches
+            scan_result = await complete_scan(
+                snapshot_id,
+                snapshot["base_url"],
+                max_pages=snapshot.get("max_pages"),
+                status_callback=self._scan_progress_sink(snapshot_id),
+                previous_snapshot_id=str(previous["_id"]) if previous else None
+            )
             
             if scan_result and scan_result.get("success"):
                 # Process the scraped data into our new structure
+                await self._update_snapshot_status(snapshot_id, {
+                    "scan_status": ScanStatus.PROCESSING.value,
+                    "current_step": "Processing scraped pages"
+                })
                 await self._process_snapshot_data(snapshot_id)
                 
                 # Update final status
@@ -187,6 +259,12 @@ class SnapshotController:
                     "current_step": "Scan completed",
                     "completed_at": datetime.utcnow()
                 })
+                
+                # Precompute "latest changes" against the previous version in the background
+                if previous:
+                    task = asyncio.create_task(self._compare_with_previous(snapshot, str(previous["_id"])))
+                    _background_comparisons.add(task)
+                    task.add_done_callback(_background_comparisons.discard)
             else:
                 await self._update_snapshot_status(snapshot_id, {
                     "scan_status": ScanStatus.FAILED.value,
@@ -204,6 +282,39 @@ class SnapshotController:
                 "completed_at": datetime.utcnow()
             })
     
+    async def _compare_with_previous(self, snapshot: Dict[str, Any], previous_snapshot_id: str):
+        """Store the comparison of a newly completed snapshot against the previous completed one"""
+        try:
+            # Imported here: the comparison controller depends on this module
+            from .comparison_controller import ComparisonController
+            
+            await ComparisonController()._run_comparison(
+                str(snapshot["website_id"]),
+                snapshot["user_id"],
+                previous_snapshot_id,
+                str(snapshot["_id"]),
+                final=True
+            )
+            logger.info(f"Stored incremental comparison for snapshot {snapshot['_id']} against {previous_snapshot_id}")
+        except Exception as e:
+            logger.error(f"Incremental comparison for snapshot {snapshot['_id']} failed: {str(e)}")
+    
+    def _scan_progress_sink(self, snapshot_id: str):
+        """Build a complete_scan status callback that writes progress onto the snapshot"""
+        async def sink(status: Dict[str, Any]):
+            updates = {
+                "current_step": status["current_step"],
+                "pages_discovered": status["total_pages"],
+                "pages_scraped": status["pages_scanned"],
+                "pages_failed": status["pages_failed"],
+                "estimated_time_remaining": status["estimated_time_remaining"]
+            }
+            # Final COMPLETED/FAILED states are set by _run_snapshot_scan once processing is done
+            if status.get("scan_status") in ("crawling", "scanning"):
+                updates["scan_status"] = ScanStatus.CRAWLING.value
+            await self._update_snapshot_status(snapshot_id, updates)
+        return sink
+    
     async def _update_snapshot_status(self, snapshot_id: str, updates: Dict[str, Any]):
         """Update snapshot status"""
         try:
@@ -217,10 +328,6 @@ class SnapshotController:
     async def _process_snapshot_data(self, snapshot_id: str):
         """Process scraped data from webpages collection into page_snapshots"""
         try:
-            # Get all webpage data for this snapshot (from old system)
-            webpages_cursor = db.webpages.find({"analysis_id": snapshot_id})
-            webpages = await webpages_cursor.to_list(length=None)
-            
             snapshot = await self.snapshots_collection.find_one({"_id": PyObjectId(snapshot_id)})
             if not snapshot:
                 return
@@ -230,66 +337,54 @@ class SnapshotController:
             warnings = 0
             good_practices = 0
             
-            for webpage in webpages:
-                # Extract data from the old format
-                url = webpage.get("url", "")
-                parsed_url = urlparse(url)
-                
-                # Extract SEO data
-                title = webpage.get("title", "")
-                meta = webpage.get("meta", {})
-                meta_description = meta.get("SEO", {}).get("description", "")
-                headings = webpage.get("headings", {})
+            # Page snapshots are inserted in unordered batches instead of one round-trip per page
+            writer = BulkWriter(
+                self.pages_collection,
+                batch_size=settings.MONGO_BULK_BATCH_SIZE,
+                flush_interval=settings.MONGO_BULK_FLUSH_INTERVAL
+            )
+            
+            # Stream webpage data for this snapshot (from old system)
+            async with writer:
+                async for webpage in db.webpages.find({"analysis_id": snapshot_id}):
+                    page = PageExtract.from_document(webpage)
                 
-                # Calculate content hash for change detection
-                content = webpage.get("content", "")
-                content_hash = hashlib.md5(content.encode()).hexdigest() if content else None
+                    # Count insights
+                    counts = page.insight_counts()
+                    page_critical = counts["Immediate Action Required"]
+                    page_warnings = counts["Needs Attention"]
+                    page_good = counts["Good Practice"]
                 
-                # Count insights
-                insights = webpage.get("insights", {})
-                page_critical = len(insights.get("Immediate Action Required", []))
-                page_warnings = len(insights.get("Needs Attention", []))
-                page_good = len(insights.get("Good Practice", []))
+                    total_insights += page_critical + page_warnings + page_good
+                    critical_issues += page_critical
+                    warnings += page_warnings
+                    good_practices += page_good
                 
-                total_insights += page_critical + page_warnings + page_good
-                critical_issues += page_critical
-                warnings += page_warnings
-                good_practices += page_good
+                    # Create page snapshot document
+                    page_doc = page.to_page_snapshot(
+                        snapshot["website_id"], PyObjectId(snapshot_id), snapshot["user_id"]
+                    )
                 
-                # Create page snapshot document
-                page_doc = {
-                    "website_id": snapshot["website_id"],
-                    "snapshot_id": PyObjectId(snapshot_id),
-                    "user_id": snapshot["user_id"],
-                    "url": url,
-                    "url_path": parsed_url.path,
-                    "title": title,
-                    "meta_description": meta_description,
-                    "h1_tags": headings.get("h1", []),
-                    "h2_tags": headings.get("h2", []),
-                    "word_count": len(content.split()) if content else 0,
-                    "seo_data": webpage,  # Store full scraped data
-                    "insights": insights,
-                    "content_hash": content_hash,
-                    "scraped_at": datetime.utcnow()
-                }
-                
-                # Insert page snapshot
-                await self.pages_collection.insert_one(page_doc)
+                    # Queue page snapshot for the next batch insert
+                    await writer.add(InsertOne(page_doc), key=page.url)
             
-            # Update snapshot summary stats
+            # Update snapshot summary stats. pages_failed already holds the scan's
+            # fetch/parse failures; pages whose snapshot insert was rejected add to it
             await self.snapshots_collection.update_one(
                 {"_id": PyObjectId(snapshot_id)},
-                {"$set": {
-                    "pages_scraped": len(webpages),
-                    "total_insights": total_insights,
-                    "critical_issues": critical_issues,
-                    "warnings": warnings,
-                    "good_practices": good_practices
-                }}
+                {
+                    "$set": {
+                        "pages_scraped": writer.written,
+                        "total_insights": total_insights,
+                        "critical_issues": critical_issues,
+                        "warnings": warnings,
+                        "good_practices": good_practices
+                    },
+                    "$inc": {"pages_failed": writer.failed}
+                }
             )
             
-            logger.info(f"Processed {len(webpages)} pages for snapshot {snapshot_id}")
+            logger.info(f"Processed {writer.written} pages for snapshot {snapshot_id} ({writer.failed} failed)")
             
         except Exception as e:
             logger.error(f"Error processing snapshot data: {str(e)}") 
\ No newline at end of file
@@ -131,7 +131,7 @@ class WebsiteController:
                 "pages_scanned": 0,
                 "total_pages": 0,
                 "current_step": "preparing",
-                "estimated_time_remaining": 300,
+                "estimated_time_remaining": None,  # Filled in from observed scan throughput
                 "created_at": datetime.utcnow(),
                 "last_updated": datetime.utcnow()
             }
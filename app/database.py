@@ -9,6 +9,24 @@ logger = logging.getLogger(__name__)
 mongo_client = AsyncIOMotorClient(settings.MONGODB_URL)
 db = mongo_client[settings.MONGODB_DB_NAME]
 
+async def ensure_indexes():
+    """Create the indexes hot queries rely on. No-op for indexes that already exist."""
+    # Snapshot comparisons stream each snapshot's pages in URL order
+    await db.page_snapshots.create_index([("snapshot_id", 1), ("url", 1)])
+    # One stored result per snapshot pair and comparison algorithm (only for completed snapshots)
+    await db.snapshot_comparisons.create_index(
+        [("baseline_snapshot_id", 1), ("current_snapshot_id", 1), ("algorithm_version", 1)],
+        unique=True,
+        partialFilterExpression={"final": True}
+    )
+    # "Latest changes" view: newest current snapshot per website
+    await db.snapshot_comparisons.create_index(
+        [("website_id", 1), ("user_id", 1), ("final", 1), ("current_snapshot_id", -1), ("baseline_snapshot_id", -1)]
+    )
+    # Paging through a comparison's page/insight changes in URL order
+    await db.comparison_changes.create_index([("comparison_id", 1), ("kind", 1), ("url", 1)])
+    logger.info("MongoDB indexes ensured")
+
 async def init_db():
     """Initialize database connections"""
     try:
@@ -16,6 +34,8 @@ async def init_db():
         await db.command('ping')
         logger.info("MongoDB connection established")
         
+        await ensure_indexes()
+        
         # Supabase connection is tested when auth is needed
         logger.info("Database initialization complete")
         
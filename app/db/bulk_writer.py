@@ -0,0 +1,88 @@
+"""
+Batched MongoDB writes.
+
+Collects write operations and sends them as unordered bulk_write calls, flushed
+when the batch is full and at least once per flush interval. One bad document
+does not fail the rest of its batch; per-document errors are logged and kept
+for the caller to report.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Keep only the first errors so a systematically failing scan cannot grow memory
+_MAX_RECORDED_ERRORS = 100
+
+class BulkWriter:
+    """Buffers pymongo write operations and flushes them in unordered batches"""
+
+    def __init__(self, collection, batch_size: int = 200, flush_interval: float = 1.0):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self.written = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+        self._pending: List[Tuple[Any, Optional[str]]] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "BulkWriter":
+        self._timer = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._timer:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+        await self.flush()
+
+    async def add(self, operation, key: Optional[str] = None):
+        """
+        Queue a write operation (InsertOne, UpdateOne, ...).
+
+        Args:
+            operation: The pymongo operation
+            key: Identifier reported with the error if this operation fails (e.g. the URL)
+        """
+        self._pending.append((operation, key))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Write everything queued so far."""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        operations = [operation for operation, _ in batch]
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            self.failed += len(write_errors)
+            self.written += len(batch) - len(write_errors)
+            for error in write_errors:
+                self._record_error(batch[error["index"]][1], error.get("errmsg", "Unknown write error"))
+        except Exception as e:
+            # The whole batch failed (e.g. connection error)
+            self.failed += len(batch)
+            for _, key in batch:
+                self._record_error(key, str(e))
+
+    def _record_error(self, key: Optional[str], message: str):
+        logger.error(f"Bulk write failed for {key or 'document'} in {self.collection.name}: {message}")
+        if len(self.errors) < _MAX_RECORDED_ERRORS:
+            self.errors.append({"key": key, "error": message})
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
@@ -9,6 +9,9 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
 from .database import init_db
+from .scrape.http_client import close_session
+from .scrape.scraper import shutdown_browser_pool
+from .scrape.parse_pool import start_parse_pool, shutdown_parse_pool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -38,8 +41,18 @@ async def startup_event():
     # Initialize MongoDB
     await init_db()
     
+    # Start parse worker processes up front when PARSE_EXECUTOR is "process"
+    start_parse_pool()
+    
     logger.info("Application initialized successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    logger.info("Shutting down application...")
+    await close_session()
+    shutdown_browser_pool()
+    shutdown_parse_pool()
+
 # Function to track background tasks
 def track_background_task(task):
     app.state.background_tasks.add(task)
@@ -33,6 +33,17 @@ class ScanStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class PageView(str, Enum):
+    """Named field projections for page snapshot queries"""
+    SUMMARY = "summary"  # Listing fields, no scraped payload
+    DIFF = "diff"        # Fields snapshot comparisons read
+    FULL = "full"        # Whole document including seo_data
+
+class ComparisonChangeKind(str, Enum):
+    """Per-page change lists of a snapshot comparison"""
+    PAGE = "page"        # Pages added, removed or modified
+    INSIGHT = "insight"  # Pages whose SEO insights changed
+
 # Master Website Record
 class Website(BaseModel):
     """Master record for a website - persistent across all snapshots"""
@@ -77,6 +88,7 @@ class WebsiteSnapshot(BaseModel):
     
     # Scan details
     base_url: str
+    max_pages: Optional[int] = None  # Crawl cap taken from the website settings
     pages_discovered: int = 0
     pages_scraped: int = 0
     pages_failed: int = 0
@@ -84,6 +96,7 @@ class WebsiteSnapshot(BaseModel):
     
     # Status tracking
     current_step: str = "Initializing"
+    estimated_time_remaining: Optional[int] = None  # Seconds, from observed scan throughput
     error_message: Optional[str] = None
     started_at: datetime = Field(default_factory=datetime.utcnow)
     completed_at: Optional[datetime] = None
@@ -133,6 +146,8 @@ class PageSnapshot(BaseModel):
     response_time_ms: Optional[int] = None
     status_code: Optional[int] = None
     content_hash: Optional[str] = None  # For change detection
+    html_hash: Optional[str] = None  # Raw HTML + extractor version fingerprint, lets re-scans skip unchanged pages
+    fingerprints: Dict[str, str] = {}  # Per-field digests (title, meta, headings, insights, links, images)
     
     # Timestamps
     scraped_at: datetime = Field(default_factory=datetime.utcnow)
@@ -164,11 +179,16 @@ class SnapshotComparison(BaseModel):
     new_issues: int = 0
     resolved_issues: int = 0
     
-    # Detailed changes
+    # Detailed changes: the first COMPARISON_CHANGES_PREVIEW of each list. The full
+    # lists live in comparison_changes (None totals: older results stored them inline)
     page_changes: List[Dict[str, Any]] = []
     insight_changes: List[Dict[str, Any]] = []
+    page_changes_total: Optional[int] = None
+    insight_changes_total: Optional[int] = None
     
     # Metadata
+    algorithm_version: Optional[int] = None  # Comparison logic that produced this result
+    final: bool = False  # Both snapshots were completed, so the result can be reused
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Config:
@@ -7,7 +7,7 @@ from ..controllers.v2 import (
 from ..models.website import (
     Website, WebsiteSnapshot, SnapshotComparison,
     WebsiteCreateRequest, SnapshotCreateRequest, ComparisonRequest,
-    WebsiteType, WebsiteListResponse, SnapshotListResponse
+    WebsiteType, WebsiteListResponse, SnapshotListResponse, PageView, ComparisonChangeKind
 )
 from ..database import db
 import logging
@@ -307,16 +307,51 @@ async def get_website_comparisons(
             detail="Error retrieving comparisons"
         )
 
+@router.get("/{website_id}/comparisons/latest", response_model=SnapshotComparison)
+async def get_latest_comparison(request: Request, website_id: str):
+    """Get the latest changes for a website (newest snapshot against the previous one)"""
+    try:
+        return await comparison_controller.get_latest_comparison(request, website_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_latest_comparison route: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving latest comparison"
+        )
+
+@router.get("/comparisons/{comparison_id}/changes")
+async def get_comparison_changes(
+    request: Request,
+    comparison_id: str,
+    kind: ComparisonChangeKind = Query(ComparisonChangeKind.PAGE, description="Change list: page or insight"),
+    skip: int = Query(0, ge=0, description="Number of changes to skip"),
+    limit: int = Query(100, ge=1, le=500, description="Number of changes to return")
+):
+    """Page through all page or insight changes of a comparison, in URL order"""
+    try:
+        return await comparison_controller.get_comparison_changes(request, comparison_id, kind, skip, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_comparison_changes route: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving comparison changes"
+        )
+
 @router.get("/snapshots/{snapshot_id}/pages")
 async def get_snapshot_pages(
     request: Request,
     snapshot_id: str,
-    limit: int = Query(50, ge=1, le=100, description="Number of pages to return")
+    limit: int = Query(50, ge=1, le=100, description="Number of pages to return"),
+    view: PageView = Query(PageView.SUMMARY, description="Fields to return: summary, diff or full")
 ):
     """Get pages for a specific snapshot"""
     try:
         pages = await snapshot_controller.get_snapshot_pages(
-            request, snapshot_id, limit
+            request, snapshot_id, limit, view
         )
         return {"pages": pages, "total": len(pages)}
     except Exception as e:
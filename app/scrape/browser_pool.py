@@ -0,0 +1,119 @@
+"""
+Pool of long-lived headless browsers for page rendering.
+
+Starting Chromium costs seconds per launch, so drivers are created lazily up to
+the pool size and reused across many page loads. A driver is recycled after a
+configured number of pages (to cap memory growth) or as soon as a page load
+fails with a browser error.
+"""
+
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+logger = logging.getLogger(__name__)
+
+class PooledBrowser:
+    """A driver plus the bookkeeping needed to decide when to recycle it"""
+
+    __slots__ = ("driver", "pages_loaded", "_closer")
+
+    def __init__(self, driver: WebDriver, closer: Callable[[WebDriver], None]):
+        self.driver = driver
+        self.pages_loaded = 0
+        self._closer = closer
+
+    def quit(self):
+        try:
+            self._closer(self.driver)
+        except Exception as e:
+            logger.warning(f"Error closing driver: {e}")
+
+class BrowserPool:
+    """Thread-safe pool of reusable WebDriver instances"""
+
+    def __init__(
+        self,
+        driver_factory: Callable[[], WebDriver],
+        driver_closer: Callable[[WebDriver], None],
+        size: int,
+        max_pages_per_browser: int
+    ):
+        self.driver_factory = driver_factory
+        self.driver_closer = driver_closer
+        self.size = size
+        self.max_pages_per_browser = max_pages_per_browser
+
+        self._idle: "queue.LifoQueue[PooledBrowser]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+
+    @contextmanager
+    def browser(self) -> Iterator[WebDriver]:
+        """
+        Borrow a driver for one page load.
+
+        Blocks until a slot is free. The driver goes back to the pool afterwards
+        unless it crashed or reached its page budget.
+        """
+        self._slots.acquire()
+        pooled = None
+        try:
+            pooled = self._checkout()
+            try:
+                yield pooled.driver
+            except TimeoutException:
+                # A slow page does not mean the browser is broken
+                raise
+            except WebDriverException:
+                logger.warning("Browser error during page load, recycling driver")
+                self._discard(pooled)
+                pooled = None
+                raise
+
+            pooled.pages_loaded += 1
+            if pooled.pages_loaded >= self.max_pages_per_browser:
+                logger.info(f"Recycling driver after {pooled.pages_loaded} pages")
+                self._discard(pooled)
+                pooled = None
+        finally:
+            if pooled is not None:
+                if self._closed:
+                    self._discard(pooled)
+                else:
+                    self._idle.put(pooled)
+            self._slots.release()
+
+    def _checkout(self) -> PooledBrowser:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        logger.info(f"Starting pooled browser ({self._live + 1}/{self.size})")
+        pooled = PooledBrowser(self.driver_factory(), self.driver_closer)
+        with self._lock:
+            self._live += 1
+        return pooled
+
+    def _discard(self, pooled: PooledBrowser):
+        pooled.quit()
+        with self._lock:
+            self._live -= 1
+
+    def close(self):
+        """Quit every idle driver. Drivers in use are quit when they are returned."""
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        logger.info("Browser pool closed")
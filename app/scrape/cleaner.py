@@ -3,153 +3,358 @@ import json
 import re
 import asyncio
 import logging
-from bs4 import BeautifulSoup
-from functools import partial
+import msgpack
+from collections import Counter
+from app.config import settings
+from app.scrape.parser_backends import parse_document, resolve_backend
+from app.scrape.parse_pool import run_parse, uses_process_pool
+from app.scrape.link_classifier import get_link_classifier
+from app.scrape.streaming_extract import extract_streaming, use_streaming_extract
+from app.scrape.main_content import extract_main_text, strip_boilerplate_enabled
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_seo_and_content(html_content):
-    """Extracts metadata, links, headings, images, and content from an HTML string."""
-    try:
-        logger.info("Starting SEO data extraction")
-        soup = BeautifulSoup(html_content, "html.parser")
+# Per-process parse counters, reported by get_parse_stats() instead of per-page log lines
+_parse_stats = Counter()
 
-        # Remove unnecessary scripts and styles
-        for tag in soup(['script', 'style']):
-            tag.decompose()
+# Bump whenever the same HTML starts extracting to different data (fields, link
+# classification, content rules), so re-scans stop reusing older extractions
+EXTRACTOR_VERSION = 1
+
+class ExtractionError(Exception):
+    """A single document in a batch could not be extracted"""
+
+# Handlers for the single-pass extraction walk, keyed by tag name.
+# Each handler receives the tag and the _ExtractionState for the page.
+_TAG_HANDLERS = {}
+
+def tag_handler(*tag_names):
+    """Register a function to be called for every tag with one of the given names."""
+    def register(handler):
+        for name in tag_names:
+            _TAG_HANDLERS.setdefault(name, []).append(handler)
+        return handler
+    return register
 
-        # Categorize meta tags
-        meta_tags = {
+class _ExtractionState:
+    """Everything collected during one walk over a document"""
+
+    def __init__(self):
+        self.meta_tags = {
             "SEO": {},
             "Technical": {},
             "Social Media": {}
         }
+        self.title_tag = None
+        self.html_tag = None
+        self.links = []
+        self.heading_tags = {f"h{i}": [] for i in range(1, 7)}
+        self.images = {}
+        self.json_ld_scripts = []
+        self.removed_tags = []
+
+@tag_handler('meta')
+def _handle_meta(tag, state):
+    # Categorize meta tags
+    name = tag.get('name') or tag.get('property')
+    content = tag.get('content')
+
+    if name and content:
+        if name in ["description", "keywords", "robots", "canonical"] or name.startswith("og:"):
+            state.meta_tags["SEO"][name] = content
+        elif name.startswith("twitter:"):
+            state.meta_tags["Social Media"][name] = content
+        else:
+            state.meta_tags["Technical"][name] = content
+
+    if tag.get('charset'):
+        state.meta_tags["Technical"]["charset"] = tag.get('charset')
 
-        logger.info("Processing meta tags")
-        for meta in soup.find_all('meta'):
-            name = meta.get('name') or meta.get('property')
-            content = meta.get('content')
+@tag_handler('title')
+def _handle_title(tag, state):
+    if state.title_tag is None:
+        state.title_tag = tag
 
-            if name and content:
-                if name in ["description", "keywords", "robots", "canonical"] or name.startswith("og:"):
-                    meta_tags["SEO"][name] = content
-                elif name.startswith("twitter:"):
-                    meta_tags["Social Media"][name] = content
-                else:
-                    meta_tags["Technical"][name] = content
+@tag_handler('html')
+def _handle_html(tag, state):
+    if state.html_tag is None:
+        state.html_tag = tag
 
-            if meta.get('charset'):
-                meta_tags["Technical"]["charset"] = meta.get('charset')
+@tag_handler('a')
+def _handle_link(tag, state):
+    if tag.has_attr('href'):
+        state.links.append(tag.get('href'))
+
+@tag_handler('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+def _handle_heading(tag, state):
+    state.heading_tags[tag.name].append(tag)
+
+@tag_handler('img')
+def _handle_image(tag, state):
+    # Extract images with src and alt text
+    alt = tag.get("alt", "")
+    state.images[tag.get("src", "")] = {
+        "alt": alt if alt else "MISSING ALT TEXT",
+        "width": tag.get("width", ""),
+        "height": tag.get("height", "")
+    }
+
+@tag_handler('script')
+def _handle_script(tag, state):
+    # Extract structured data (JSON-LD) before the script is removed
+    if tag.get('type') == 'application/ld+json':
+        try:
+            if tag.string:
+                state.json_ld_scripts.append(json.loads(tag.string))
+        except json.JSONDecodeError:
+            state.json_ld_scripts.append({"error": "Invalid JSON-LD"})
+    state.removed_tags.append(tag)
+
+@tag_handler('style')
+def _handle_style(tag, state):
+    state.removed_tags.append(tag)
+
+def extract_seo_and_content(html_content, backend=None, content_mode=None, base_url=None, page_url=None):
+    """
+    Extracts metadata, links, headings, images, and content from an HTML string.
+    
+    All fields are collected in a single walk over the parsed tree, dispatching
+    each tag to the handlers registered for its name with @tag_handler.
+    
+    Args:
+        html_content (str): The HTML to analyze
+        backend (str, optional): Parser backend ("html.parser", "lxml" or "auto"),
+            defaults to settings.HTML_PARSER_BACKEND
+        content_mode (str, optional): "all" for every content text node or "main" to
+            drop navigation boilerplate, defaults to settings.CONTENT_EXTRACTION_MODE
+        base_url (str, optional): Scanned site; links to its host, www twin or
+            subdomains are internal. Defaults to the page's own host
+        page_url (str, optional): URL of this page, for resolving relative links
+    """
+    try:
+        soup = parse_document(html_content, backend)
+
+        state = _ExtractionState()
+        handlers = _TAG_HANDLERS
+        for tag in soup.find_all(True):
+            for handler in handlers.get(tag.name, ()):
+                handler(tag, state)
+
+        # Remove scripts and styles so they do not leak into extracted text
+        for tag in state.removed_tags:
+            tag.decompose()
 
         # Extract page title
-        title = soup.title.string.strip() if soup.title else "No Title"
-        logger.info(f"Extracted title: {title[:50]}...")
+        title_tag = state.title_tag
+        title = title_tag.string.strip() if title_tag else "No Title"
 
-        # Extract all links
-        logger.info("Processing links")
-        links = [link.get('href') for link in soup.find_all('a', href=True)]
-        internal_links = [link for link in links if link and (link.startswith("/") or "leapsandrebounds.com" in link)]
-        external_links = [link for link in links if link and "leapsandrebounds.com" not in link and not link.startswith("/")]
+        # Classify links
+        internal_links, external_links = get_link_classifier(base_url or page_url).classify(state.links, page_url)
 
         # Extract headings by level
-        logger.info("Processing headings")
-        headings = {f"h{i}": [h.get_text(strip=True) for h in soup.find_all(f"h{i}")] for i in range(1, 7)}
-
-        # Extract images with src and alt text
-        logger.info("Processing images")
-        images = {}
-        for img in soup.find_all("img"):
-            src = img.get("src", "")
-            alt = img.get("alt", "")
-            images[src] = {
-                "alt": alt if alt else "MISSING ALT TEXT",
-                "width": img.get("width", ""),
-                "height": img.get("height", "")
-            }
-
-        # Extract structured data (JSON-LD)
-        logger.info("Processing structured data")
-        json_ld_scripts = []
-        for script in soup.find_all("script", type="application/ld+json"):
-            try:
-                if script.string:
-                    json_ld_scripts.append(json.loads(script.string))
-            except json.JSONDecodeError:
-                json_ld_scripts.append({"error": "Invalid JSON-LD"})
+        headings = {
+            level: [h.get_text(strip=True) for h in tags]
+            for level, tags in state.heading_tags.items()
+        }
+
+        # Extract text content, each text node once
+        cleaned_content = extract_main_text(soup, strip_boilerplate_enabled(content_mode))
 
-        # Extract text content
-        logger.info("Processing text content")
-        paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
-        divs = [div.get_text(separator=' ', strip=True) for div in soup.find_all(['div', 'section', 'article'])]
-        cleaned_content = ' '.join(paragraphs + divs)
+        # Fragments parsed by html.parser have no <html> element
+        html_tag = state.html_tag
 
         result = {
             "title": title,
-            "meta": meta_tags,
+            "meta": state.meta_tags,
             "links": {
                 "internal": internal_links,
                 "external": external_links
             },
             "headings": headings,
-            "images": images,
-            "structured_data": json_ld_scripts,
+            "images": state.images,
+            "structured_data": state.json_ld_scripts,
             "content": cleaned_content,
-            "html_lang": soup.find('html').get('lang', '')
+            "html_lang": html_tag.get('lang', '') if html_tag else ''
         }
 
-        logger.info("SEO data extraction completed successfully")
         return result
 
     except Exception as e:
         logger.error(f"Error in extract_seo_and_content: {str(e)}")
         raise
 
-def _process_html_sync(html_content):
+def extract_page(html_content, base_url=None, page_url=None):
+    """
+    Extract SEO data with the extractor suited to the document's size.
+    
+    Documents above STREAMING_PARSE_THRESHOLD_CHARS go through the size-bounded
+    streaming extractor, whose result also carries an "overflow" section.
+    """
+    if use_streaming_extract(html_content):
+        logger.debug(f"Using streaming extraction for a {len(html_content)}-character document")
+        return extract_streaming(html_content, base_url=base_url, page_url=page_url)
+    return extract_seo_and_content(html_content, base_url=base_url, page_url=page_url)
+
+def extractor_signature():
+    """Extractor version plus the settings that change its output, folded into reuse keys."""
+    return f"{EXTRACTOR_VERSION}:{resolve_backend()}:{settings.CONTENT_EXTRACTION_MODE.lower()}"
+
+def _process_html_sync(html_content, base_url=None, page_url=None):
     """Synchronous function to process HTML and return structured SEO insights."""
     try:
-        seo_data = extract_seo_and_content(html_content)
-        return json.dumps(seo_data, indent=4, ensure_ascii=False)
+        return extract_page(html_content, base_url, page_url)
     except Exception as e:
         logger.error(f"Error in _process_html_sync: {str(e)}")
         raise
 
-async def process_html(html_content):
+def _extract_packed(html_bytes, base_url=None, page_url=None):
+    """Process pool entry point: UTF-8 HTML in, msgpack-encoded SEO data out."""
+    seo_data = extract_page(html_bytes.decode("utf-8"), base_url, page_url)
+    return msgpack.packb(seo_data, use_bin_type=True)
+
+def _process_html_batch_sync(documents):
+    """
+    Extract every document of a batch, isolating failures per document.
+    
+    Returns:
+        list: [seo_data, None] or [None, error message] per document, in order
+    """
+    results = []
+    for html_content, base_url, page_url in documents:
+        try:
+            if isinstance(html_content, bytes):
+                html_content = html_content.decode("utf-8")
+            results.append([extract_page(html_content, base_url, page_url), None])
+        except Exception as e:
+            logger.debug(f"Extraction failed for {page_url or 'document'}: {str(e)}")
+            results.append([None, str(e) or type(e).__name__])
+    return results
+
+def _pack_outcome(outcome):
+    """msgpack-encode one [seo_data, error] pair; unencodable data becomes that document's error."""
+    try:
+        return msgpack.packb(outcome, use_bin_type=True)
+    except Exception as e:
+        # e.g. a JSON-LD integer beyond 64 bits
+        return msgpack.packb([None, f"Could not serialize extraction: {str(e) or type(e).__name__}"], use_bin_type=True)
+
+def _extract_batch_packed(documents):
+    """Process pool entry point for a batch: one msgpack-encoded [seo_data, error] per document."""
+    return [_pack_outcome(outcome) for outcome in _process_html_batch_sync(documents)]
+
+def _count_result(seo_data, html_content):
+    _parse_stats["documents"] += 1
+    _parse_stats["chars"] += len(html_content)
+    if "overflow" in seo_data:
+        _parse_stats["streamed"] += 1
+        if seo_data["overflow"].get("truncated"):
+            _parse_stats["truncated"] += 1
+
+def get_parse_stats():
+    """Counters for the parsing done from this process so far."""
+    return dict(_parse_stats)
+
+async def process_html(html_content, base_url=None, page_url=None):
     """
     Asynchronous wrapper for HTML processing.
-    Uses a thread pool for CPU-intensive operations.
+    Runs the CPU-intensive parsing in the configured parse executor (a thread
+    pool, or worker processes when PARSE_EXECUTOR is "process").
     
     Args:
         html_content (str): The HTML content to process
+        base_url (str, optional): Scanned site, used to classify internal links
+        page_url (str, optional): URL the HTML was fetched from
         
     Returns:
-        str: JSON string containing structured SEO data
+        dict: Structured SEO data
     """
     try:
-        logger.info("Starting async HTML processing")
-        
-        # Run the CPU-intensive processing in a thread pool
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            partial(_process_html_sync, html_content)
-        )
+        if uses_process_pool():
+            # Ship compact bytes both ways instead of pickling str/dict trees
+            packed = await run_parse(_extract_packed, html_content.encode("utf-8"), base_url, page_url)
+            result = msgpack.unpackb(packed, raw=False)
+        else:
+            result = await run_parse(_process_html_sync, html_content, base_url, page_url)
         
-        logger.info("HTML processing completed successfully")
+        _count_result(result, html_content)
         return result
         
     except Exception as e:
+        _parse_stats["failed"] += 1
         logger.error(f"Error in async process_html: {str(e)}")
         raise
 
+async def process_html_batch(documents):
+    """
+    Parse several documents in one executor dispatch.
+    
+    A document that fails does not affect the rest of the batch; its slot in the
+    result holds an ExtractionError instead of the SEO data.
+    
+    Args:
+        documents (list): (html_content, base_url, page_url) tuples
+        
+    Returns:
+        list: Structured SEO data dict or ExtractionError per document, in order
+    """
+    if not documents:
+        return []
+    
+    if uses_process_pool():
+        outcomes = [None] * len(documents)
+        payload = []
+        for index, (html_content, base_url, page_url) in enumerate(documents):
+            try:
+                if isinstance(html_content, str):
+                    html_content = html_content.encode("utf-8")
+            except UnicodeEncodeError as e:
+                # e.g. lone surrogates; fails this document only
+                outcomes[index] = [None, f"Could not encode HTML: {str(e)}"]
+                continue
+            payload.append((index, (html_content, base_url, page_url)))
+        
+        if payload:
+            packed = await run_parse(_extract_batch_packed, [document for _, document in payload])
+            for (index, _), packed_outcome in zip(payload, packed):
+                outcomes[index] = msgpack.unpackb(packed_outcome, raw=False)
+    else:
+        outcomes = await run_parse(_process_html_batch_sync, list(documents))
+    
+    _parse_stats["batches"] += 1
+    results = []
+    for (html_content, _, page_url), (seo_data, error) in zip(documents, outcomes):
+        if error is not None:
+            _parse_stats["failed"] += 1
+            results.append(ExtractionError(f"{page_url or 'document'}: {error}"))
+        else:
+            _count_result(seo_data, html_content)
+            results.append(seo_data)
+    return results
+
+async def process_html_json(html_content, base_url=None, page_url=None):
+    """
+    process_html, serialized as an indented JSON string for printing.
+    
+    Args:
+        html_content (str): The HTML content to process
+        base_url (str, optional): Scanned site, used to classify internal links
+        page_url (str, optional): URL the HTML was fetched from
+        
+    Returns:
+        str: JSON string containing structured SEO data
+    """
+    seo_data = await process_html(html_content, base_url, page_url)
+    return json.dumps(seo_data, indent=4, ensure_ascii=False)
+
 # Example usage
 if __name__ == "__main__":
     async def main():
         with open("example.html", "r", encoding="utf-8") as file:
             html_content = file.read()
         try:
-            result = await process_html(html_content)
+            result = await process_html_json(html_content)
             print(result)
         except Exception as e:
             print(f"Error processing HTML: {e}")
@@ -1,75 +1,256 @@
 import aiohttp
 from bs4 import BeautifulSoup
 import urllib.parse
-from urllib.parse import urlparse
-from typing import List
+from urllib.parse import urlparse, urldefrag
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
 import logging
 import asyncio
 
-async def crawl_and_clean_urls(base_url: str) -> List[str]:
+from app.config import settings
+from app.scrape.http_client import get_session, close_session
+from app.scrape.link_classifier import LinkClassifier
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Links with these extensions never lead to crawlable HTML pages
+_SKIPPED_EXTENSIONS = (
+    '.pdf', '.zip', '.gz', '.rar', '.exe', '.dmg',
+    '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico',
+    '.mp3', '.mp4', '.avi', '.mov', '.webm',
+    '.css', '.js', '.xml', '.json', '.txt'
+)
+
+def _normalize_url(url: str) -> Optional[str]:
+    """Drop fragments and non-page links so each page is only queued once."""
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https'):
+        return None
+    if parsed.path.lower().endswith(_SKIPPED_EXTENSIONS):
+        return None
+    return parsed._replace(path=parsed.path or '/').geturl()
+
+def _extract_links(html: str) -> List[str]:
+    """Parse a page and return the href of every link on it."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [link['href'] for link in soup.find_all('a', href=True)]
+
+def _site_key(url: str) -> str:
+    """Dedup key treating a URL on the www host and on the bare host as the same page."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return parsed._replace(netloc=host).geturl()
+
+class CrawlFrontier:
+    """
+    Breadth-first frontier of one site's pages.
+
+    Hands out each same-site URL once, with its link depth, and takes back the
+    links found on every page it handed out. Whoever fetches the pages (the
+    standalone crawler below, or the scan pipeline, which feeds back links from
+    the pages it fetched and rendered anyway) calls add_links() for a page and
+    then page_done(), and iteration ends once every handed-out page is done and
+    nothing new was found.
+
+    A link is on the site when its host is the base URL's host or its www/bare
+    twin, or the host the start page redirected to (and its twin). Subdomains
+    (app., docs., shop.) are separate sites and are not crawled, although
+    LinkClassifier counts links to them as internal.
+    """
+
+    def __init__(self, base_url: str, max_pages: Optional[int] = None, max_depth: Optional[int] = None):
+        self.max_pages = max_pages or settings.CRAWL_MAX_PAGES
+        self.max_depth = settings.CRAWL_MAX_DEPTH if max_depth is None else max_depth
+        self._site_hosts = set(LinkClassifier(base_url).hosts)
+
+        start_url = _normalize_url(base_url) or base_url
+        self.discovered = 1
+        self._seen = {_site_key(start_url)}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queue.put_nowait((start_url, 0))
+        # Pages handed out (or queued) whose links have not been reported yet
+        self._pending = 1
+
+    def _on_site(self, host: str) -> bool:
+        return host in self._site_hosts
+
+    def follows_links(self, depth: int) -> bool:
+        """Whether links found on a page at this depth are still crawled."""
+        return depth < self.max_depth and self.discovered < self.max_pages
+
+    def add_links(self, page_url: str, links: Iterable[str], depth: int) -> int:
+        """
+        Queue the unseen same-site links found on a page.
+
+        Args:
+            page_url: URL the page was served from (after redirects), for resolving relative links
+            links: href values found on the page
+            depth: Link depth of the page
+
+        Returns:
+            int: Number of newly discovered URLs
+        """
+        if depth == 0:
+            # The start page may redirect to another host (example.com -> example.org)
+            host = urlparse(page_url).hostname or ''
+            if host and not self._on_site(host):
+                self._site_hosts.update(LinkClassifier(page_url).hosts)
+
+        # A redirect target was just fetched; links to it must not queue it again
+        served_url = _normalize_url(page_url)
+        if served_url:
+            self._seen.add(_site_key(served_url))
+
+        if not self.follows_links(depth):
+            return 0
+
+        added = 0
+        for link in links:
+            if self.discovered >= self.max_pages:
+                break
+            try:
+                link = _normalize_url(urllib.parse.urljoin(page_url, link.strip()))
+            except ValueError:
+                continue
+            if not link or not self._on_site(urlparse(link).hostname or ''):
+                continue
+            key = _site_key(link)
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.discovered += 1
+            self._pending += 1
+            self._queue.put_nowait((link, depth + 1))
+            added += 1
+        return added
+
+    def page_done(self):
+        """Mark a handed-out page as finished, whether or not it could be fetched."""
+        self._pending -= 1
+        if self._pending == 0:
+            self._queue.put_nowait(None)
+
+    async def get(self) -> Optional[Tuple[str, int]]:
+        """Next (url, depth) to visit, or None once the crawl is complete."""
+        item = await self._queue.get()
+        if item is None:
+            # Let every other consumer see the end too
+            self._queue.put_nowait(None)
+        return item
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[str, int]]:
+        while True:
+            item = await self.get()
+            if item is None:
+                return
+            yield item
+
+async def _fetch_links(session: aiohttp.ClientSession, url: str) -> Tuple[str, List[str]]:
+    """Fetch a page and return the URL it was served from and its hrefs (no links on any error)."""
+    try:
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.error(f"Error status {response.status} for {url}")
+                return url, []
+            if 'html' not in response.headers.get('Content-Type', 'text/html'):
+                return url, []
+
+            content = await response.text()
+            page_url = str(response.url)
+
+        # Link extraction is CPU bound, keep it off the event loop
+        loop = asyncio.get_event_loop()
+        return page_url, await loop.run_in_executor(None, _extract_links, content)
+
+    except aiohttp.ClientError as e:
+        logger.error(f"Error crawling {url}: {str(e)}")
+        return url, []
+    except asyncio.TimeoutError:
+        logger.error(f"Timeout while crawling {url}")
+        return url, []
+    except Exception as e:
+        logger.error(f"Unexpected error while crawling {url}: {str(e)}")
+        return url, []
+
+async def crawl_site(
+    base_url: str,
+    max_pages: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[str]:
     """
-    Crawls a URL and returns a cleaned list of all links found on the page.
+    Breadth-first crawl of a website, yielding same-site URLs as they are discovered.
+
+    A pool of concurrent workers pulls pages from the frontier, so discovery runs
+    ahead of whatever the caller does with each yielded URL. The scan pipeline
+    does not use this: it drives a CrawlFrontier with the pages it fetches itself.
+
+    Args:
+        base_url (str): The URL to start from, also used as base domain filter
+        max_pages (int, optional): Stop after this many URLs have been discovered
+        max_depth (int, optional): Number of link hops to follow from the base URL
+        concurrency (int, optional): Number of pages fetched in parallel
+
+    Yields:
+        str: Each unique URL on the site, base URL first
+    """
+    concurrency = concurrency or settings.CRAWL_CONCURRENCY
+    frontier = CrawlFrontier(base_url, max_pages=max_pages, max_depth=max_depth)
+    discovered: asyncio.Queue = asyncio.Queue()
+    session = get_session()
+
+    async def worker():
+        async for url, depth in frontier:
+            discovered.put_nowait(url)
+            try:
+                if frontier.follows_links(depth):
+                    page_url, links = await _fetch_links(session, url)
+                    frontier.add_links(page_url, links, depth)
+            finally:
+                frontier.page_done()
+
+    async def close_when_drained():
+        await asyncio.gather(*workers)
+        discovered.put_nowait(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    closer = asyncio.create_task(close_when_drained())
+
+    try:
+        while True:
+            url = await discovered.get()
+            if url is None:
+                break
+            yield url
+    finally:
+        closer.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(closer, *workers, return_exceptions=True)
+        logger.info(f"Crawl finished: {frontier.discovered} unique URLs discovered from {base_url}")
+
+async def crawl_and_clean_urls(
+    base_url: str,
+    max_pages: Optional[int] = None,
+    max_depth: Optional[int] = None
+) -> List[str]:
+    """
+    Crawls a website and returns a cleaned list of all pages found.
     The links are deduplicated and filtered to only include URLs from the same domain.
-    
+
     Args:
         base_url (str): The URL to crawl and use as base domain filter
-        
+        max_pages (int, optional): Maximum number of URLs to return
+        max_depth (int, optional): Number of link hops to follow from the base URL
+
     Returns:
-        list: Cleaned and filtered list of URLs from the page
+        list: Cleaned and filtered list of URLs from the site
     """
-    # Configure logging
-    logging.basicConfig(level=logging.INFO)
-    logger = logging.getLogger(__name__)
-    
-    async def get_page_links(url: str) -> List[str]:
-        """Helper function to get all links from a page"""
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        logger.error(f"Error status {response.status} for {url}")
-                        return []
-                    
-                    content = await response.text()
-                    soup = BeautifulSoup(content, 'html.parser')
-                    links = soup.find_all('a', href=True)
-                    
-                    # Convert relative URLs to absolute
-                    urls = [urllib.parse.urljoin(url, link['href']) for link in links]
-                    logger.info(f"Found {len(urls)} raw URLs")
-                    return urls
-            
-        except aiohttp.ClientError as e:
-            logger.error(f"Error crawling {url}: {str(e)}")
-            return []
-        except Exception as e:
-            logger.error(f"Unexpected error while crawling {url}: {str(e)}")
-            return []
-    
-    def clean_urls(urls: List[str]) -> List[str]:
-        """Helper function to clean and filter URLs"""
-        # Get the base domain
-        base_domain = urlparse(base_url).netloc
-        
-        # Filter URLs to only those matching base domain
-        filtered_urls = [
-            url for url in urls 
-            if urlparse(url).netloc == base_domain
-        ]
-        
-        # Remove duplicates while preserving order
-        cleaned_urls = list(dict.fromkeys(filtered_urls))
-        logger.info(f"Cleaned URLs: {len(cleaned_urls)} unique URLs from same domain")
-        return cleaned_urls
-    
-    # Execute the crawl and clean process
-    raw_urls = await get_page_links(base_url)
-    cleaned_urls = clean_urls(raw_urls)
-    
-    # Add a small delay to prevent overwhelming the server
-    await asyncio.sleep(0.1)
-    
-    return cleaned_urls
+    return [url async for url in crawl_site(base_url, max_pages=max_pages, max_depth=max_depth)]
 
 # Example usage
 if __name__ == "__main__":
@@ -78,5 +259,6 @@ if __name__ == "__main__":
         results = await crawl_and_clean_urls(test_url)
         for url in results:
             print(url)
-    
-    asyncio.run(main())
\ No newline at end of file
+        await close_session()
+
+    asyncio.run(main())
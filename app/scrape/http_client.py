@@ -0,0 +1,78 @@
+"""
+Shared HTTP client for all outbound page fetches.
+
+A single aiohttp ClientSession is kept for the lifetime of the application so
+connections (and their TCP/TLS handshakes) are reused across the crawler and any
+other static fetcher. The connector caps total and per-host connections and
+caches DNS lookups.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+import aiohttp
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli  # noqa: F401  (enables aiohttp's transparent br decoding)
+    _ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    _ACCEPT_ENCODING = "gzip, deflate"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; ScopeLabsBot/1.0)",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+}
+
+_session: Optional[aiohttp.ClientSession] = None
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _create_session() -> aiohttp.ClientSession:
+    """Build the pooled session from settings."""
+    connector = aiohttp.TCPConnector(
+        limit=settings.HTTP_MAX_CONNECTIONS,
+        limit_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=DEFAULT_HEADERS,
+        timeout=aiohttp.ClientTimeout(total=settings.CRAWL_REQUEST_TIMEOUT),
+        auto_decompress=True,
+    )
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Return the shared ClientSession, creating it on first use.
+
+    Sessions are bound to an event loop, so a new one is created if the running
+    loop changed (e.g. scripts calling asyncio.run more than once).
+    """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        _session = _create_session()
+        _session_loop = loop
+        logger.info(
+            f"Created shared HTTP session (limit={settings.HTTP_MAX_CONNECTIONS}, "
+            f"per_host={settings.HTTP_MAX_CONNECTIONS_PER_HOST})"
+        )
+    return _session
+
+async def close_session():
+    """Close the shared session. Called on application shutdown."""
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("Closed shared HTTP session")
+    _session = None
+    _session_loop = None
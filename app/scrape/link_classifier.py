@@ -0,0 +1,84 @@
+"""
+Internal vs external link classification.
+
+A link is internal when it resolves to the scanned site's host, its www/bare
+twin, or any subdomain of the bare host (blog.example.com for example.com).
+Relative hrefs are resolved against the page URL before the host is checked.
+Hosts are compared against a precomputed set, and the verdict per host is
+cached, so link-heavy pages cost one dict lookup per link.
+
+Links that do not point at a web page (mailto:, tel:, javascript:, ...) are
+neither internal nor external and are left out of both lists.
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+WEB_SCHEMES = frozenset({"http", "https"})
+
+def _bare_host(host: str) -> str:
+    return host[4:] if host.startswith("www.") else host
+
+class LinkClassifier:
+    """Splits a page's hrefs into internal and external links for one site"""
+
+    def __init__(self, base_url: Optional[str] = None):
+        host = (urlsplit(base_url).hostname or "") if base_url else ""
+        self.bare_host = _bare_host(host)
+        self.hosts = frozenset({self.bare_host, f"www.{self.bare_host}"}) if self.bare_host else frozenset()
+        self._subdomain_suffix = f".{self.bare_host}"
+        self._verdicts: Dict[str, bool] = {}
+
+    def is_internal_host(self, host: str) -> bool:
+        verdict = self._verdicts.get(host)
+        if verdict is None:
+            verdict = host in self.hosts or (
+                bool(self.bare_host) and host.endswith(self._subdomain_suffix)
+            )
+            self._verdicts[host] = verdict
+        return verdict
+
+    def classify(self, hrefs: Iterable[str], page_url: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """
+        Split hrefs into (internal, external), keeping the raw href strings.
+
+        Args:
+            hrefs: href attribute values in document order
+            page_url: URL of the page the links were found on, for resolving relative hrefs
+        """
+        internal: List[str] = []
+        external: List[str] = []
+
+        for href in hrefs:
+            if not href:
+                continue
+            link = href.strip()
+            try:
+                parts = urlsplit(link)
+                if not parts.scheme and not parts.netloc:
+                    # Relative to the current page, which is on the scanned site
+                    if not page_url:
+                        internal.append(href)
+                        continue
+                    parts = urlsplit(urljoin(page_url, link))
+                host = parts.hostname or ""
+            except ValueError:
+                # Malformed URL (e.g. a broken IPv6 literal); cannot point at the site
+                external.append(href)
+                continue
+
+            if parts.scheme and parts.scheme.lower() not in WEB_SCHEMES:
+                continue
+
+            if self.is_internal_host(host):
+                internal.append(href)
+            else:
+                external.append(href)
+
+        return internal, external
+
+@lru_cache(maxsize=256)
+def get_link_classifier(base_url: Optional[str]) -> LinkClassifier:
+    """Shared classifier per site, so the host set and verdict cache are built once per scan."""
+    return LinkClassifier(base_url)
@@ -0,0 +1,92 @@
+"""
+Main-content text extraction.
+
+Page text is gathered from the text nodes inside <p>, <div>, <section> and
+<article> elements. Each text node is emitted exactly once, however deeply
+its content containers are nested, so the output grows linearly with the page.
+
+With boilerplate removal on, text inside navigation chrome (<nav>, <header>,
+<footer>, <aside>, plus elements whose class or id looks like a menu, cookie
+banner, sidebar, ...) is skipped. Class and id are not checked on the
+page-level containers (<html>, <body>, <main>, <article>), whose classes
+describe the page layout ("has-sidebar", "menu-open") rather than chrome.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+from bs4.element import NavigableString, PreformattedString, Tag
+
+from app.config import settings
+
+# Extraction modes for CONTENT_EXTRACTION_MODE
+MODE_ALL = "all"
+MODE_MAIN = "main"
+
+CONTENT_TAGS = frozenset({"p", "div", "section", "article"})
+
+BOILERPLATE_TAGS = frozenset({"nav", "header", "footer", "aside"})
+
+# Never boilerplate, whatever their class or id says
+PAGE_CONTAINER_TAGS = frozenset({"html", "body", "main", "article"})
+
+BOILERPLATE_PATTERN = re.compile(
+    r"(?:^|[\s_-])(?:nav|navbar|menu|breadcrumbs?|header|footer|sidebar|"
+    r"cookies?|consent|banner|social|share|newsletter|subscribe|popup|modal)(?:$|[\s_-])",
+    re.IGNORECASE,
+)
+
+def strip_boilerplate_enabled(mode: Optional[str] = None) -> bool:
+    """Whether the configured (or given) extraction mode removes boilerplate."""
+    mode = (mode or settings.CONTENT_EXTRACTION_MODE).lower()
+    if mode not in (MODE_ALL, MODE_MAIN):
+        raise ValueError(f"Unknown content extraction mode '{mode}'")
+    return mode == MODE_MAIN
+
+def is_boilerplate(name: str, class_names: Iterable[str] = (), element_id: str = "") -> bool:
+    """Whether an element is navigation chrome rather than page content."""
+    if name in BOILERPLATE_TAGS:
+        return True
+    if name in PAGE_CONTAINER_TAGS:
+        return False
+    markers = " ".join(class_names)
+    if element_id:
+        markers = f"{markers} {element_id}"
+    return bool(markers) and BOILERPLATE_PATTERN.search(markers) is not None
+
+def _tag_is_boilerplate(tag: Tag) -> bool:
+    class_names = tag.get("class") or ()
+    if isinstance(class_names, str):
+        class_names = class_names.split()
+    return is_boilerplate(tag.name, class_names, tag.get("id") or "")
+
+def extract_main_text(root: Tag, strip_boilerplate: bool = False) -> str:
+    """
+    Join the text nodes that sit inside a content container, each exactly once.
+
+    Args:
+        root: Parsed document (scripts and styles already removed)
+        strip_boilerplate: Skip text inside navigation chrome
+
+    Returns:
+        str: Stripped text nodes joined with single spaces, in document order
+    """
+    parts: List[str] = []
+    # (node, inside a content container) pairs, walked depth first without recursion
+    stack = [(child, False) for child in reversed(root.contents)]
+
+    while stack:
+        node, in_content = stack.pop()
+
+        if isinstance(node, Tag):
+            if strip_boilerplate and _tag_is_boilerplate(node):
+                continue
+            in_content = in_content or node.name in CONTENT_TAGS
+            stack.extend((child, in_content) for child in reversed(node.contents))
+        elif in_content and isinstance(node, NavigableString) and not isinstance(node, PreformattedString):
+            # PreformattedString covers comments, CDATA, doctypes and declarations
+            text = node.strip()
+            if text:
+                parts.append(text)
+
+    return " ".join(parts)
@@ -0,0 +1,214 @@
+"""
+Typed record for one extracted page.
+
+A PageExtract carries a page from the cleaner through complete_scan into the
+webpages collection, and from there into page snapshots, without rebuilding
+nested dicts at every step. Instances use __slots__, and the keys of the fixed
+sections (meta categories, link kinds, heading levels, insight categories) are
+interned so thousands of in-flight pages share one copy of each key string
+instead of one per decoded document.
+
+to_document() and from_document() convert losslessly to and from the
+webpages document shape: fields the record does not model (the Mongo _id,
+report fields added later, ...) are kept aside and written back unchanged.
+"""
+
+import hashlib
+import json
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+# Top-level sections produced by extract_seo_and_content
+SECTION_KEYS = tuple(sys.intern(key) for key in (
+    "title", "meta", "links", "headings", "images", "structured_data", "content", "html_lang"
+))
+
+INSIGHT_CATEGORIES = tuple(sys.intern(key) for key in (
+    "Immediate Action Required", "Needs Attention", "Good Practice"
+))
+
+# Page snapshot fields summarized by fingerprints(), compared before any field is decoded
+FINGERPRINT_FIELDS = ("title", "meta", "headings", "insights", "links", "images")
+
+def _fingerprint(value: Any) -> str:
+    """Short stable digest of a JSON-serializable value."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+def _intern_keys(mapping: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy a small fixed-key mapping with interned keys."""
+    if not mapping:
+        return {}
+    return {sys.intern(key): value for key, value in mapping.items()}
+
+class PageExtract:
+    """Structured SEO data for one page"""
+
+    __slots__ = (
+        "title", "meta", "links", "headings", "images", "structured_data", "content", "html_lang",
+        "url", "analysis_id", "fetch", "insights", "html_hash", "extra"
+    )
+
+    def __init__(
+        self,
+        url: str,
+        title: str = "",
+        meta: Optional[Dict[str, Dict[str, str]]] = None,
+        links: Optional[Dict[str, List[str]]] = None,
+        headings: Optional[Dict[str, List[str]]] = None,
+        images: Optional[Dict[str, Dict[str, str]]] = None,
+        structured_data: Optional[List[Any]] = None,
+        content: str = "",
+        html_lang: str = "",
+        analysis_id: Optional[str] = None,
+        fetch: Optional[Dict[str, Any]] = None,
+        insights: Optional[Dict[str, List[Any]]] = None,
+        html_hash: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ):
+        self.url = url
+        self.title = title
+        self.meta = {category: _intern_keys(tags) for category, tags in _intern_keys(meta).items()}
+        self.links = _intern_keys(links)
+        self.headings = _intern_keys(headings)
+        self.images = images or {}
+        self.structured_data = structured_data or []
+        self.content = content
+        self.html_lang = html_lang
+        self.analysis_id = analysis_id
+        self.fetch = fetch
+        self.insights = _intern_keys(insights) if insights is not None else None
+        self.html_hash = html_hash
+        self.extra = extra or {}
+
+    @classmethod
+    def from_extract(
+        cls,
+        seo_data: Dict[str, Any],
+        url: str,
+        analysis_id: Optional[str] = None,
+        fetch: Optional[Dict[str, Any]] = None
+    ) -> "PageExtract":
+        """Wrap the dict returned by process_html / extract_seo_and_content."""
+        sections = {}
+        extra = {}
+        for key, value in seo_data.items():
+            if key in SECTION_KEYS:
+                sections[key] = value
+            else:
+                # e.g. the streaming extractor's overflow stats
+                extra[key] = value
+        return cls(url=url, analysis_id=analysis_id, fetch=fetch, extra=extra, **sections)
+
+    @classmethod
+    def from_document(cls, document: Dict[str, Any]) -> "PageExtract":
+        """Build a record from a webpages document, keeping unmodelled fields in extra."""
+        fields = {}
+        extra = {}
+        for key, value in document.items():
+            if key in cls.__slots__ and key != "extra":
+                fields[key] = value
+            else:
+                extra[key] = value
+        fields.setdefault("url", "")
+        return cls(extra=extra, **fields)
+
+    def to_document(self) -> Dict[str, Any]:
+        """The webpages document shape (inverse of from_document)."""
+        document = dict(self.extra)
+        for key in SECTION_KEYS:
+            document[key] = getattr(self, key)
+        document["url"] = self.url
+        if self.analysis_id is not None:
+            document["analysis_id"] = self.analysis_id
+        if self.fetch is not None:
+            document["fetch"] = self.fetch
+        if self.insights is not None:
+            document["insights"] = self.insights
+        if self.html_hash is not None:
+            document["html_hash"] = self.html_hash
+        return document
+
+    @staticmethod
+    def hash_html(html: str, extractor: str = "") -> str:
+        """
+        Fingerprint of the raw fetched HTML, used to skip re-parsing unchanged pages.
+
+        Args:
+            html: The fetched HTML
+            extractor: Extractor signature (cleaner.extractor_signature()), so a
+                changed extractor never reuses data extracted by the old one
+        """
+        digest = hashlib.md5(extractor.encode("utf-8"))
+        digest.update(b"\n")
+        digest.update(html.encode("utf-8", errors="replace"))
+        return digest.hexdigest()
+
+    @property
+    def meta_description(self) -> str:
+        return self.meta.get("SEO", {}).get("description", "")
+
+    @property
+    def word_count(self) -> int:
+        return len(self.content.split()) if self.content else 0
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        return hashlib.md5(self.content.encode()).hexdigest() if self.content else None
+
+    def fingerprints(self) -> Dict[str, str]:
+        """
+        Per-field digests stored on page snapshots so comparisons can skip
+        decoding fields that did not change. Insights and headings are compared
+        as sets, so their order does not affect the digest.
+        """
+        insights = self.insights or {}
+        return {
+            "title": _fingerprint(self.title),
+            "meta": _fingerprint(self.meta),
+            "headings": _fingerprint({level: sorted(set(texts)) for level, texts in self.headings.items()}),
+            "insights": _fingerprint({
+                category: sorted(set(map(str, insights.get(category, [])))) for category in INSIGHT_CATEGORIES
+            }),
+            "links": _fingerprint(self.links),
+            "images": _fingerprint(self.images)
+        }
+
+    def insight_counts(self) -> Dict[str, int]:
+        """Number of insights per category (0 for missing categories)."""
+        insights = self.insights or {}
+        return {category: len(insights.get(category, [])) for category in INSIGHT_CATEGORIES}
+
+    def to_page_snapshot(self, website_id: Any, snapshot_id: Any, user_id: str) -> Dict[str, Any]:
+        """
+        Build the page_snapshots document for this page.
+
+        Args:
+            website_id: Master website record ID
+            snapshot_id: Snapshot the page belongs to
+            user_id: Owner of the website
+        """
+        insights = self.insights
+        if insights is None:
+            insights = {category: [] for category in INSIGHT_CATEGORIES}
+
+        return {
+            "website_id": website_id,
+            "snapshot_id": snapshot_id,
+            "user_id": user_id,
+            "url": self.url,
+            "url_path": urlparse(self.url).path,
+            "title": self.title,
+            "meta_description": self.meta_description,
+            "h1_tags": self.headings.get("h1", []),
+            "h2_tags": self.headings.get("h2", []),
+            "word_count": self.word_count,
+            "seo_data": self.to_document(),  # Store full scraped data
+            "insights": insights,
+            "content_hash": self.content_hash,
+            "html_hash": self.html_hash,
+            "fingerprints": self.fingerprints(),
+            "scraped_at": datetime.utcnow()
+        }
@@ -0,0 +1,129 @@
+"""
+Executor for CPU-bound HTML parsing.
+
+BeautifulSoup is pure Python and holds the GIL, so with the default thread
+executor parsing never uses more than one core and competes with the event loop
+serving API requests. With PARSE_EXECUTOR="process" parsing runs in a pool of
+worker processes instead. Workers are started (and have their parser imports
+and caches warmed up) when the pool is created, and at most PARSE_MAX_PENDING
+parses are submitted at once so a large scan cannot queue unbounded HTML in
+the pool's call queue.
+
+If a worker process dies (e.g. killed for memory on a huge page) the pool is
+broken for good, so it is shut down and replaced: the parses that were in
+flight fail, and the next one starts a fresh pool.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+_WARM_UP_HTML = (
+    '<html lang="en"><head><title>warm-up</title><meta name="description" content="x"></head>'
+    '<body><div><h1>warm-up</h1><p>text <a href="/">link</a></p><img src="/x.png"></div></body></html>'
+)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def uses_process_pool() -> bool:
+    """Whether parsing is configured to run in worker processes."""
+    mode = settings.PARSE_EXECUTOR.lower()
+    if mode not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+        raise ValueError(f"Unknown parse executor '{settings.PARSE_EXECUTOR}'")
+    return mode == EXECUTOR_PROCESS
+
+def _pool_size() -> int:
+    return settings.PARSE_PROCESS_WORKERS or os.cpu_count() or 1
+
+def _warm_up_worker():
+    """Process initializer: import the parser stack and run one tiny parse."""
+    # Workers log through the same config as the app; keep per-page INFO noise out
+    logging.getLogger("app.scrape.cleaner").setLevel(logging.WARNING)
+
+    from app.scrape.cleaner import extract_seo_and_content
+    extract_seo_and_content(_WARM_UP_HTML)
+
+def _ping() -> int:
+    return os.getpid()
+
+def start_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Create the worker pool if process parsing is enabled and it does not exist yet.
+
+    Called on application startup so the first scan does not pay for worker
+    start-up; also called lazily by run_parse.
+    """
+    global _pool
+
+    if not uses_process_pool():
+        return None
+    if _pool is None:
+        size = _pool_size()
+        # spawn rather than fork: the parent runs Selenium and executor threads
+        _pool = ProcessPoolExecutor(
+            max_workers=size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up_worker,
+        )
+        # Submitting one task per worker up front starts every process now
+        for _ in range(size):
+            _pool.submit(_ping)
+        logger.info(f"Started HTML parse pool with {size} worker processes")
+    return _pool
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Submission limiter, recreated if the running loop changed."""
+    global _semaphore, _semaphore_loop
+
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(settings.PARSE_MAX_PENDING)
+        _semaphore_loop = loop
+    return _semaphore
+
+async def run_parse(func: Callable[..., Any], *args) -> Any:
+    """
+    Run a parse function off the event loop in the configured executor.
+
+    In process mode func and its arguments must be picklable, so callers pass
+    module-level functions and compact inputs (e.g. UTF-8 bytes).
+    """
+    executor = start_parse_pool()
+    async with _get_semaphore():
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            _discard_broken_pool(executor)
+            raise
+
+def _discard_broken_pool(broken: ProcessPoolExecutor):
+    """Drop a pool whose worker died, unless a concurrent parse already replaced it."""
+    global _pool
+
+    if _pool is broken:
+        _pool = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("HTML parse pool broke (a worker process died); starting a new one on the next parse")
+
+def shutdown_parse_pool():
+    """Stop the worker processes. Called on application shutdown."""
+    global _pool
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Stopped HTML parse pool")
+    _pool = None
@@ -0,0 +1,59 @@
+"""
+HTML parser backends for the cleaner.
+
+extract_seo_and_content works on a BeautifulSoup tree; the backend only decides
+which tree builder produces it. "html.parser" is the pure-Python builder the
+cleaner has always used, "lxml" builds the tree through libxml2 and is faster
+on large pages. Both yield identical output for well-formed markup; on
+mis-nested tags (e.g. a <div> inside an unclosed <p>) lxml applies the HTML
+implied end-tag rules while html.parser keeps the literal nesting, so headings
+and content text can differ. html.parser therefore stays the default and lxml
+("lxml" or "auto") is opt-in; tests/test_parser_backends.py tracks parity.
+"""
+
+import logging
+from typing import List, Optional
+
+from bs4 import BeautifulSoup
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+HTML_PARSER = "html.parser"
+LXML = "lxml"
+
+def _lxml_available() -> bool:
+    try:
+        import lxml  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+_LXML_AVAILABLE = _lxml_available()
+
+def available_backends() -> List[str]:
+    """Backends that can be used in this environment."""
+    return [HTML_PARSER, LXML] if _LXML_AVAILABLE else [HTML_PARSER]
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """
+    Pick the parser backend to use.
+
+    Args:
+        backend: "html.parser", "lxml" or "auto"; defaults to settings.HTML_PARSER_BACKEND.
+            "auto" prefers lxml when it is installed.
+    """
+    backend = backend or settings.HTML_PARSER_BACKEND
+    if backend == "auto":
+        return LXML if _LXML_AVAILABLE else HTML_PARSER
+    if backend == LXML and not _LXML_AVAILABLE:
+        logger.warning("lxml parser backend requested but lxml is not installed, using html.parser")
+        return HTML_PARSER
+    if backend not in (HTML_PARSER, LXML):
+        raise ValueError(f"Unknown HTML parser backend: {backend}")
+    return backend
+
+def parse_document(html_content: str, backend: Optional[str] = None) -> BeautifulSoup:
+    """Build a BeautifulSoup tree for html_content with the selected backend."""
+    return BeautifulSoup(html_content, resolve_backend(backend))
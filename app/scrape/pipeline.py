@@ -0,0 +1,104 @@
+"""
+Bounded multi-stage asyncio pipeline.
+
+Items flow from an async source through a chain of stages. Each stage has its
+own worker count and a bounded input queue, so a slow stage applies
+backpressure to the stages before it instead of letting work pile up in memory.
+A stage can also take its input in batches of whatever is already queued.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class Stage:
+    """One step of the pipeline: an async handler run by a fixed number of workers"""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Optional[Any]]],
+        workers: int = 1,
+        batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            name: Stage name used in logs
+            handler: Coroutine taking one item and returning the item for the next
+                stage, or None to drop it. When batch_size is set it takes a list
+                of items and returns a list of results (None entries are dropped)
+            workers: Number of concurrent workers for this stage
+            batch_size: Most items handed to one handler call (a batch of 1 is still
+                a list). A worker never waits for a batch to fill; it takes what is
+                queued, up to this many
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = None if batch_size is None else max(1, batch_size)
+
+async def _run_stage_worker(stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+    while True:
+        item = await inbox.get()
+        try:
+            result = await stage.handler(item)
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+        except Exception as e:
+            # Handlers report their own per-item errors; this only guards the worker
+            logger.error(f"Unhandled error in {stage.name} stage: {str(e)}")
+        finally:
+            inbox.task_done()
+
+async def _run_batch_stage_worker(stage: Stage, inbox: asyncio.Queue, outbox: Optional[asyncio.Queue]):
+    while True:
+        batch = [await inbox.get()]
+        while len(batch) < stage.batch_size:
+            try:
+                batch.append(inbox.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            results = await stage.handler(batch)
+            if outbox is not None:
+                for result in results:
+                    if result is not None:
+                        await outbox.put(result)
+        except Exception as e:
+            logger.error(f"Unhandled error in {stage.name} stage: {str(e)}")
+        finally:
+            for _ in batch:
+                inbox.task_done()
+
+async def run_pipeline(source: AsyncIterator[Any], stages: List[Stage], queue_size: int):
+    """
+    Feed every item from source through the stages and wait until all are processed.
+
+    Args:
+        source: Async iterator producing the input items
+        stages: Stages in processing order
+        queue_size: Capacity of each stage's input queue
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+    workers = []
+    for index, stage in enumerate(stages):
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        run_worker = _run_stage_worker if stage.batch_size is None else _run_batch_stage_worker
+        workers.extend(
+            asyncio.create_task(run_worker(stage, queues[index], outbox))
+            for _ in range(stage.workers)
+        )
+
+    try:
+        async for item in source:
+            await queues[0].put(item)
+
+        # Draining in order guarantees each stage has handed everything downstream
+        for queue in queues:
+            await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
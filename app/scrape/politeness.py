@@ -0,0 +1,44 @@
+"""
+Per-host politeness limits for page fetches.
+
+Caps how many requests run against one host at a time and spaces out request
+starts to that host, without slowing down fetches to other hosts.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict
+from urllib.parse import urlparse
+
+class _HostState:
+    __slots__ = ("semaphore", "lock", "next_start")
+
+    def __init__(self, max_concurrent: int):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.lock = asyncio.Lock()
+        self.next_start = 0.0
+
+class HostThrottle:
+    """Limits concurrency and request rate per host"""
+
+    def __init__(self, max_concurrent_per_host: int, min_interval: float):
+        self.max_concurrent_per_host = max(1, max_concurrent_per_host)
+        self.min_interval = min_interval
+        self._hosts: Dict[str, _HostState] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """Wait until a request to url's host is allowed, and hold the slot while it runs."""
+        host = urlparse(url).netloc
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.max_concurrent_per_host)
+
+        async with state.semaphore:
+            async with state.lock:
+                loop = asyncio.get_event_loop()
+                delay = state.next_start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                state.next_start = loop.time() + self.min_interval
+            yield
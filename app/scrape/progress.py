@@ -0,0 +1,94 @@
+"""
+Coalesced scan progress reporting.
+
+Counters are kept in memory and written out through a sink at most once per
+flush interval or every N completed pages, whichever comes first, instead of
+one status write per page. The estimated time remaining is derived from the
+throughput observed so far.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+StatusSink = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class ProgressReporter:
+    """Tracks scan counters and flushes them to a status sink in batches"""
+
+    def __init__(self, sink: StatusSink, flush_interval: float = 2.0, flush_every_pages: int = 10):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.flush_every_pages = flush_every_pages
+
+        self.pages_discovered = 0
+        self.pages_scanned = 0
+        self.pages_failed = 0
+        self.current_url: Optional[str] = None
+
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self._pages_at_last_flush = 0
+        self._lock = asyncio.Lock()
+
+    def page_discovered(self):
+        self.pages_discovered += 1
+
+    async def page_scanned(self, url: str):
+        self.pages_scanned += 1
+        self.current_url = url
+        await self._maybe_flush()
+
+    async def page_failed(self):
+        self.pages_failed += 1
+        await self._maybe_flush()
+
+    def estimated_time_remaining(self) -> Optional[int]:
+        """Seconds left at the throughput observed so far, or None before the first page."""
+        done = self.pages_scanned + self.pages_failed
+        if done == 0:
+            return None
+        elapsed = time.monotonic() - self._started
+        remaining = max(self.pages_discovered - done, 0)
+        return int(remaining * elapsed / done)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counters in the status document shape."""
+        return {
+            "current_step": f"Analyzed page {self.pages_scanned} of {self.pages_discovered}",
+            "pages_scanned": self.pages_scanned,
+            "pages_failed": self.pages_failed,
+            "total_pages": self.pages_discovered,
+            "current_url": self.current_url,
+            "estimated_time_remaining": self.estimated_time_remaining()
+        }
+
+    async def flush(self, extra: Optional[Dict[str, Any]] = None):
+        """
+        Write the current counters now. Used for the final status on completion or error.
+
+        Args:
+            extra: Fields merged over the counters (e.g. scan_status, completion_time)
+        """
+        async with self._lock:
+            status = self.snapshot()
+            if extra:
+                status.update(extra)
+            self._last_flush = time.monotonic()
+            self._pages_at_last_flush = self.pages_scanned + self.pages_failed
+            try:
+                await self.sink(status)
+            except Exception as e:
+                logger.error(f"Failed to report scan progress: {e}")
+
+    async def _maybe_flush(self):
+        done_since_flush = self.pages_scanned + self.pages_failed - self._pages_at_last_flush
+        due = (
+            done_since_flush >= self.flush_every_pages
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+        if due and not self._lock.locked():
+            await self.flush({"scan_status": "scanning"})
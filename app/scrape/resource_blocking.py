@@ -0,0 +1,76 @@
+"""
+Request blocking profile for headless renders.
+
+The scraper only needs the final DOM, so images, fonts, media and third-party
+analytics are blocked through CDP's Network.setBlockedURLs. Blocking a resource
+does not remove its element, so <img> tags keep their src/alt/width/height
+attributes for extract_seo_and_content.
+"""
+
+import logging
+from typing import List
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+RESOURCE_TYPE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "ogg", "ogv", "mp3", "wav", "m4a", "mov"),
+}
+
+ANALYTICS_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "connect.facebook.net",
+    "hotjar.com",
+    "cdn.segment.com",
+    "mixpanel.com",
+    "clarity.ms",
+    "js.hs-analytics.net",
+    "js-agent.newrelic.com",
+    "nr-data.net",
+    "fullstory.com",
+    "snap.licdn.com",
+    "static.ads-twitter.com",
+)
+
+def _split_setting(value: str) -> List[str]:
+    return [item.strip().lower() for item in value.split(",") if item.strip()]
+
+def blocked_resource_types() -> List[str]:
+    """Resource types named in RENDER_BLOCKED_RESOURCE_TYPES, lowercased."""
+    return _split_setting(settings.RENDER_BLOCKED_RESOURCE_TYPES)
+
+def build_blocked_url_patterns() -> List[str]:
+    """Translate the configured blocking profile into Network.setBlockedURLs patterns."""
+    blocked_types = blocked_resource_types()
+    patterns = []
+
+    for resource_type in blocked_types:
+        for extension in RESOURCE_TYPE_EXTENSIONS.get(resource_type, ()):
+            # The second pattern catches cache-busting query strings (logo.png?v=3)
+            patterns.append(f"*.{extension}")
+            patterns.append(f"*.{extension}?*")
+
+    domains = _split_setting(settings.RENDER_BLOCKED_DOMAINS)
+    if "analytics" in blocked_types:
+        domains.extend(ANALYTICS_DOMAINS)
+    patterns.extend(f"*{domain}/*" for domain in domains)
+
+    return patterns
+
+def apply_resource_blocking(driver: WebDriver):
+    """Enable the blocking profile on a driver. Applies to every later navigation."""
+    patterns = build_blocked_url_patterns()
+    if not patterns:
+        return
+
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    logger.debug(f"Blocking {len(patterns)} URL patterns for renders")
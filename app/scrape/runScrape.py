@@ -1,12 +1,20 @@
-import json
 import os
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
-from app.scrape.crawler import crawl_and_clean_urls
-from app.scrape.scraper import fetch_html
-from app.scrape.cleaner import process_html
+from app.scrape.crawler import CrawlFrontier
+from app.scrape.scraper import fetch_page
+from app.scrape.cleaner import process_html_batch, get_parse_stats, extractor_signature
+from app.scrape.page_extract import PageExtract
+from app.scrape.pipeline import Stage, run_pipeline
+from app.scrape.politeness import HostThrottle
+from app.scrape.progress import ProgressReporter, StatusSink
+from app.config import settings
+from app.db.bulk_writer import BulkWriter
+from pymongo import UpdateOne
+from bson import ObjectId
 import asyncio
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import logging
 
 # Load environment variables from .env file
@@ -38,86 +46,228 @@ async def update_scan_status(analysis_id: str, status: dict):
     except Exception as e:
         logger.error(f"Failed to update scan status: {e}")
 
-async def complete_scan(analysis_id: str, base_url: str):
+async def _load_previous_hashes(snapshot_id: str) -> Dict[str, Tuple[str, ObjectId]]:
+    """Map each page URL of a snapshot to its (html_hash, page snapshot _id)."""
+    previous = {}
+    cursor = db.page_snapshots.find(
+        {"snapshot_id": ObjectId(snapshot_id), "html_hash": {"$ne": None}},
+        {"url": 1, "html_hash": 1}
+    )
+    async for page in cursor:
+        previous[page["url"]] = (page["html_hash"], page["_id"])
+    return previous
+
+async def _reuse_previous_pages(page_ids: List[ObjectId]) -> Dict[ObjectId, PageExtract]:
+    """Load the extraction and insights stored for unchanged pages, in one query."""
+    reused = {}
+    cursor = db.page_snapshots.find({"_id": {"$in": page_ids}}, {"seo_data": 1, "insights": 1})
+    async for page in cursor:
+        if not page.get("seo_data"):
+            continue
+        seo_data = dict(page["seo_data"])
+        # The stored copy carries the previous scan's webpages _id
+        seo_data.pop("_id", None)
+        extract = PageExtract.from_document(seo_data)
+        if page.get("insights") is not None:
+            extract.insights = page["insights"]
+        reused[page["_id"]] = extract
+    return reused
+
+async def complete_scan(
+    analysis_id: str,
+    base_url: str,
+    max_pages: Optional[int] = None,
+    status_callback: Optional[StatusSink] = None,
+    previous_snapshot_id: Optional[str] = None
+):
     """
     Crawls a website, fetches and cleans each page, and upserts the cleaned data into MongoDB.
-    Provides regular status updates during the process.
+    Pages go through a bounded fetch -> parse -> store pipeline with separate worker
+    pools per stage. Each page is fetched once: the internal links extracted by the
+    parse stage (from the static or rendered HTML) are fed back into the crawl
+    frontier, capped at max_pages.
+    
+    Progress is reported in coalesced batches through status_callback, which
+    defaults to updating the analysis record.
+    
+    When previous_snapshot_id is given, pages whose raw HTML hashes the same as in
+    that snapshot reuse its extraction and insights instead of being parsed again.
     """
+    if status_callback is None:
+        async def status_callback(status: dict):
+            await update_scan_status(analysis_id, status)
+
+    progress = ProgressReporter(
+        status_callback,
+        flush_interval=settings.SCAN_PROGRESS_FLUSH_INTERVAL,
+        flush_every_pages=settings.SCAN_PROGRESS_FLUSH_PAGES
+    )
+
     try:
         logger.info(f"Starting scan for analysis_id: {analysis_id}, url: {base_url}")
         
         # Update initial status
-        await update_scan_status(analysis_id, {
+        await progress.flush({
             "scan_status": "crawling",
-            "current_step": "Discovering pages",
-            "pages_scanned": 0,
-            "total_pages": 0
+            "current_step": "Discovering pages"
         })
 
-        # Get list of URLs to process
-        urls = await crawl_and_clean_urls(base_url)  # Make sure this is async too
-        total_pages = len(urls)
-        pages_scanned = 0
+        fetch_modes = {"static": 0, "rendered": 0}
+        pages_unchanged = 0
+        previous_hashes = await _load_previous_hashes(previous_snapshot_id) if previous_snapshot_id else {}
+        extractor = extractor_signature()
+        throttle = HostThrottle(settings.SCAN_HOST_MAX_CONCURRENCY, settings.SCAN_HOST_MIN_INTERVAL)
 
-        # Update status with total pages
-        await update_scan_status(analysis_id, {
-            "total_pages": total_pages,
-            "current_step": "Starting page analysis"
-        })
+        frontier = CrawlFrontier(base_url, max_pages=max_pages)
+        progress.page_discovered()
 
-        for url in urls:
+        # The crawl ends once frontier.page_done() was called exactly once for every URL it
+        # handed out: here for pages that are not passed on, by follow_links for the rest
+        async def fetch_stage(item: Tuple[str, int]):
+            url, depth = item
+            fetch_result = None
             try:
-                logger.info(f"Processing: {url}")
-                
-                # Update current page status
-                await update_scan_status(analysis_id, {
-                    "scan_status": "scanning",
-                    "current_step": f"Analyzing page {pages_scanned + 1} of {total_pages}",
-                    "pages_scanned": pages_scanned,
-                    "current_url": url
-                })
-
-                # Fetch raw HTML
-                html_content = await fetch_html(url)  # Make sure this is async too
-
-                if not html_content:
-                    logger.warning(f"Skipping {url} (No content found)")
-                    continue
-
-                # Clean and extract SEO data
-                cleaned_data = await process_html(html_content)  # Make sure this is async too
-                cleaned_data_dict = json.loads(cleaned_data)
-
-                # Attach analysis ID and URL to the document
-                cleaned_data_dict["analysis_id"] = analysis_id
-                cleaned_data_dict["url"] = url
-
-                # Upsert into MongoDB
-                await collection.update_one(
-                    {"url": url, "analysis_id": analysis_id},
-                    {"$set": cleaned_data_dict},
-                    upsert=True
-                )
+                logger.debug(f"Processing: {url}")
+
+                # Fetch raw HTML, statically where possible
+                async with throttle.slot(url):
+                    fetch_result = await fetch_page(url)
+
+                if fetch_result:
+                    fetch_modes[fetch_result.fetch_mode] += 1
+                    return url, depth, fetch_result
+                logger.warning(f"Skipping {url} (No content found)")
+            except Exception as e:
+                logger.error(f"Error fetching {url}: {str(e)}")
+
+            await progress.page_failed()
+            frontier.page_done()
+            return None
+
+        def follow_links(items, pages):
+            # New URLs found on this batch go back to the frontier, then the pages are done.
+            # External links are passed too: the frontier also accepts the host the site redirected to
+            for (url, depth, fetch_result), page in zip(items, pages):
+                if page is not None:
+                    hrefs = page.links.get("internal", []) + page.links.get("external", [])
+                    found = frontier.add_links(fetch_result.final_url or url, hrefs, depth)
+                    for _ in range(found):
+                        progress.page_discovered()
+                frontier.page_done()
 
-                pages_scanned += 1
-                logger.info(f"Upserted data for {url}")
+        async def parse_stage(items):
+            pages = [None] * len(items)
+            try:
+                await parse_batch(items, pages)
+            finally:
+                follow_links(items, pages)
+            return pages
+
+        async def parse_batch(items, pages):
+            nonlocal pages_unchanged
+            html_hashes = [PageExtract.hash_html(fetch_result.html, extractor) for _, _, fetch_result in items]
+
+            # Byte-identical to the previous snapshot (and same extractor): reuse its extraction
+            unchanged = {}
+            for index, (url, _, _) in enumerate(items):
+                previous = previous_hashes.get(url)
+                if previous and previous[0] == html_hashes[index]:
+                    unchanged[index] = previous[1]
+            reused = {}
+            if unchanged:
+                try:
+                    reused = await _reuse_previous_pages(list(unchanged.values()))
+                except Exception as e:
+                    logger.warning(f"Could not reuse previous extractions: {str(e)}")
 
-                # Small delay to prevent overwhelming the server
-                await asyncio.sleep(0.1)
+            to_parse = []
+            for index in range(len(items)):
+                page = reused.get(unchanged.get(index))
+                if page is not None:
+                    pages[index] = page
+                    pages_unchanged += 1
+                else:
+                    to_parse.append(index)
 
+            # Clean and extract SEO data for the rest of the batch in one dispatch
+            try:
+                results = await process_html_batch([
+                    (items[index][2].html, base_url, items[index][2].final_url or items[index][0])
+                    for index in to_parse
+                ])
             except Exception as e:
-                logger.error(f"Error processing {url}: {str(e)}")
-                continue
+                # The dispatch itself failed (e.g. a worker process died): none of these pages were parsed
+                logger.error(f"Error processing a batch of {len(to_parse)} pages: {str(e)}")
+                results = [e] * len(to_parse)
+            for index, result in zip(to_parse, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing {items[index][0]}: {str(result)}")
+                    await progress.page_failed()
+                else:
+                    pages[index] = PageExtract.from_extract(result, url=items[index][0])
+
+            # Attach analysis ID, URL and fetch details to each document
+            for (url, _, fetch_result), page, html_hash in zip(items, pages, html_hashes):
+                if page is not None:
+                    page.url = url
+                    page.analysis_id = analysis_id
+                    page.fetch = fetch_result.to_dict()
+                    page.html_hash = html_hash
+
+        async def store_stage(page: PageExtract):
+            url = page.url
+            # Queue the upsert; the writer sends it to MongoDB in batches
+            await writer.add(
+                UpdateOne(
+                    {"url": url, "analysis_id": analysis_id},
+                    {"$set": page.to_document()},
+                    upsert=True
+                ),
+                key=url
+            )
+            await progress.page_scanned(url)
+
+        writer = BulkWriter(
+            collection,
+            batch_size=settings.MONGO_BULK_BATCH_SIZE,
+            flush_interval=settings.MONGO_BULK_FLUSH_INTERVAL
+        )
+        async with writer:
+            await run_pipeline(
+                frontier,
+                [
+                    Stage("fetch", fetch_stage, workers=settings.SCAN_FETCH_WORKERS),
+                    Stage(
+                        "parse",
+                        parse_stage,
+                        workers=settings.SCAN_PARSE_WORKERS,
+                        batch_size=settings.SCAN_PARSE_BATCH_SIZE
+                    ),
+                    Stage("store", store_stage, workers=settings.SCAN_STORE_WORKERS)
+                ],
+                queue_size=settings.SCAN_QUEUE_SIZE
+            )
+
+        # Pages whose upsert was rejected are reported as failed, not scanned
+        progress.pages_scanned -= writer.failed
+        progress.pages_failed += writer.failed
 
         # Update completion status
-        await update_scan_status(analysis_id, {
+        await progress.flush({
             "scan_status": "completed",
             "current_step": "Scan completed",
-            "pages_scanned": pages_scanned,
+            "estimated_time_remaining": 0,
+            "pages_static": fetch_modes["static"],
+            "pages_rendered": fetch_modes["rendered"],
+            "pages_unchanged": pages_unchanged,
+            "write_errors": writer.errors,
             "completion_time": datetime.utcnow()
         })
 
-        logger.info("Scan complete.")
+        logger.info(
+            f"Scan complete. {progress.pages_scanned} scanned, {progress.pages_failed} failed, "
+            f"{pages_unchanged} unchanged, fetch modes: {fetch_modes}, parse stats: {get_parse_stats()}"
+        )
         return {"success": True, "message": "Scan completed successfully"}
 
     except Exception as e:
@@ -125,7 +275,7 @@ async def complete_scan(analysis_id: str, base_url: str):
         logger.error(error_message)
         
         # Update error status
-        await update_scan_status(analysis_id, {
+        await progress.flush({
             "scan_status": "error",
             "current_step": "Error occurred",
             "error_message": error_message
@@ -1,16 +1,76 @@
 import time
 import asyncio
 import os
+import re
+import shutil
+import socket
+import tempfile
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
 import logging
+import aiohttp
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from functools import partial
+from typing import Optional, Tuple
+
+from app.config import settings
+from app.scrape.browser_pool import BrowserPool
+from app.scrape.http_client import get_session, close_session
+from app.scrape.settle import install_mutation_tracker, drain_network_events, wait_for_settle
+from app.scrape.resource_blocking import apply_resource_blocking, blocked_resource_types
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_DRIVER_START_ATTEMPTS = 3
+
+# Fetch modes: "tiered" tries a static fetch first, "static" never renders, "render" always renders
+FETCH_MODE_TIERED = "tiered"
+FETCH_MODE_STATIC = "static"
+FETCH_MODE_RENDER = "render"
+
+# Why a static fetch returned no HTML. A missing page or binary content is the same for a
+# browser, so those pages are skipped. Any other error status may be a WAF or bot challenge
+# aimed at the static client's user agent, and a transport error may not recur, so those
+# pages are worth a headless render
+STATIC_FAILURE_STATUS = "http_status"
+STATIC_FAILURE_NOT_HTML = "not_html"
+STATIC_FAILURE_REFUSED = "http_refused"
+STATIC_FAILURE_TRANSPORT = "transport_error"
+
+# Statuses that mean the page does not exist, for any client
+_DEFINITIVE_STATUSES = frozenset({404, 410})
+
+# Heuristics used to decide whether a statically fetched page needs a JS render
+_NON_VISIBLE_BLOCKS = re.compile(r"<(script|style|noscript|template|svg)\b.*?</\1\s*>", re.I | re.S)
+_TAGS = re.compile(r"<[^>]+>")
+_WHITESPACE = re.compile(r"\s+")
+_SPA_ROOT_MARKERS = re.compile(
+    r"<div[^>]+id=[\"'](root|app|__next|__nuxt|___gatsby)[\"']|ng-app|data-reactroot|<app-root",
+    re.I
+)
+_NOSCRIPT_BLOCK = re.compile(r"<noscript\b[^>]*>(.*?)</noscript\s*>", re.I | re.S)
+
+@dataclass
+class FetchResult:
+    """HTML for one page plus how it was obtained"""
+    html: str
+    fetch_mode: str  # "static" or "rendered"
+    render_reason: Optional[str] = None  # Why a tiered fetch escalated to the browser
+    elapsed_ms: int = 0
+    final_url: Optional[str] = None  # URL after redirects, for resolving relative links
+
+    def to_dict(self) -> dict:
+        return {
+            "mode": self.fetch_mode,
+            "render_reason": self.render_reason,
+            "elapsed_ms": self.elapsed_ms
+        }
+
 def _get_chromium_driver_path():
     """Get the path to the system chromium driver."""
     # Common paths for chromium-driver in Linux/Docker environments
@@ -28,10 +88,14 @@ def _get_chromium_driver_path():
     
     raise Exception("No chromium driver found. Please install chromium-driver package.")
 
-def _fetch_html_sync(url: str) -> str:
-    """Synchronous function to fetch HTML content using Selenium."""
-    logger.info(f"Starting HTML fetch for: {url}")
-    
+def _allocate_debugging_port() -> int:
+    """Ask the OS for a free local port for Chromium's DevTools endpoint."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _build_chrome_options(profile_dir: str, debugging_port: int) -> Options:
+    """Chromium options for one pooled browser, isolated to its own profile and port."""
     chrome_options = Options()
     
     # Set chromium binary location - works for Docker and local with chromium installed
@@ -50,7 +114,7 @@ def _fetch_html_sync(url: str) -> str:
     chrome_options.add_argument("--disable-logging")
     chrome_options.add_argument("--disable-web-security")
     chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-    chrome_options.add_argument("--remote-debugging-port=9222")
+    chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
     chrome_options.add_argument("--disable-background-timer-throttling")
     chrome_options.add_argument("--disable-backgrounding-occluded-windows")
     chrome_options.add_argument("--disable-renderer-backgrounding")
@@ -65,9 +129,20 @@ def _fetch_html_sync(url: str) -> str:
     chrome_options.add_argument("--ignore-ssl-errors")
     chrome_options.add_argument("--ignore-certificate-errors")
     chrome_options.add_argument("--ignore-certificate-errors-spki-list")
-    chrome_options.add_argument("--user-data-dir=/tmp/chrome-user-data")
-    chrome_options.add_argument("--data-path=/tmp/chrome-data")
-    chrome_options.add_argument("--disk-cache-dir=/tmp/chrome-cache")
+    # Per-browser profile so concurrent renders (and uvicorn workers) never share a profile lock
+    chrome_options.add_argument(f"--user-data-dir={os.path.join(profile_dir, 'user-data')}")
+    chrome_options.add_argument(f"--data-path={os.path.join(profile_dir, 'data')}")
+    chrome_options.add_argument(f"--disk-cache-dir={os.path.join(profile_dir, 'cache')}")
+    
+    # Return from driver.get at DOMContentLoaded; wait_for_settle decides when the page is done
+    chrome_options.page_load_strategy = "eager"
+    
+    # Expose CDP Network events through the performance log for network-idle detection
+    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    
+    # Extension-less image URLs slip past the CDP patterns, so stop Blink loading images at all
+    if "image" in blocked_resource_types():
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
     
     # Set window size for consistent rendering
     chrome_options.add_argument("--window-size=1920,1080")
@@ -76,81 +151,243 @@ def _fetch_html_sync(url: str) -> str:
     chrome_options.add_argument("--max_old_space_size=4096")
     chrome_options.add_argument("--memory-pressure-off")
     
-    driver = None
+    return chrome_options
+
+def _create_driver() -> webdriver.Chrome:
+    """Launch a new Chromium instance for the browser pool."""
+    # Use system chromium driver instead of ChromeDriverManager
+    driver_path = _get_chromium_driver_path()
+    profile_dir = tempfile.mkdtemp(prefix="chrome-profile-")
+    
+    # The port is only reserved until the socket closes, so retry if another process grabs it first
+    last_error = None
+    for attempt in range(_DRIVER_START_ATTEMPTS):
+        try:
+            options = _build_chrome_options(profile_dir, _allocate_debugging_port())
+            driver = webdriver.Chrome(service=Service(driver_path), options=options)
+            break
+        except WebDriverException as e:
+            last_error = e
+            logger.warning(f"Chromium failed to start (attempt {attempt + 1}): {e}")
+    else:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+        raise last_error
+    
+    driver.profile_dir = profile_dir
+    
+    # Set shorter timeouts to prevent hanging
+    driver.set_page_load_timeout(settings.BROWSER_PAGE_LOAD_TIMEOUT)
+    driver.implicitly_wait(5)
+    install_mutation_tracker(driver)
+    apply_resource_blocking(driver)
+    return driver
+
+def _close_driver(driver: webdriver.Chrome):
+    """Quit a pooled browser and remove its profile directory."""
     try:
-        # Use system chromium driver instead of ChromeDriverManager
-        driver_path = _get_chromium_driver_path()
-        service = Service(driver_path)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Set shorter timeouts to prevent hanging
-        driver.set_page_load_timeout(20)
-        driver.implicitly_wait(5)
-        
-        logger.info(f"Loading page: {url}")
-        driver.get(url)
-        
-        # Wait for JavaScript to execute - reduced from 5 to 3 seconds
-        logger.info("Waiting for page load...")
-        time.sleep(3)
-        
-        html_content = driver.page_source
-        logger.info(f"Successfully fetched HTML for: {url} (length: {len(html_content)})")
-        return html_content
+        driver.quit()
+    finally:
+        shutil.rmtree(getattr(driver, "profile_dir", ""), ignore_errors=True)
+
+# Long-lived browsers shared by all renders; sized from configuration
+_browser_pool = BrowserPool(
+    _create_driver,
+    _close_driver,
+    size=settings.BROWSER_POOL_SIZE,
+    max_pages_per_browser=settings.BROWSER_MAX_PAGES_PER_INSTANCE
+)
+
+# Dedicated threads for renders so waiting on a browser never starves the default executor
+_render_executor = ThreadPoolExecutor(
+    max_workers=settings.BROWSER_POOL_SIZE,
+    thread_name_prefix="render"
+)
+
+def _fetch_html_sync(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """Synchronous function to fetch HTML content (and the URL it ended up at) using a pooled Selenium browser."""
+    logger.info(f"Starting HTML fetch for: {url}")
+    
+    try:
+        with _browser_pool.browser() as driver:
+            # Discard network events left over from this browser's previous page
+            drain_network_events(driver, set())
+            
+            logger.info(f"Loading page: {url}")
+            driver.get(url)
+            
+            # Wait until the page is loaded, network idle and the DOM quiet (bounded)
+            wait_for_settle(driver, set())
+            
+            html_content = driver.page_source
+            logger.info(f"Successfully fetched HTML for: {url} (length: {len(html_content)})")
+            return html_content, driver.current_url
         
     except Exception as e:
         logger.error(f"Error fetching {url}: {e}")
+        return None, None
+
+def shutdown_browser_pool():
+    """Quit all pooled browsers. Called on application shutdown."""
+    _browser_pool.close()
+    _render_executor.shutdown(wait=False)
+
+def needs_js_render(html: str) -> Optional[str]:
+    """
+    Decide whether statically fetched HTML is complete enough to analyze.
+    
+    Returns:
+        str: The reason the page needs a headless render, or None if the static HTML is usable
+    """
+    if not html or not html.strip():
+        return "empty_body"
+    
+    visible_text = _WHITESPACE.sub(" ", _TAGS.sub(" ", _NON_VISIBLE_BLOCKS.sub(" ", html))).strip()
+    if len(visible_text) >= settings.STATIC_MIN_TEXT_CHARS:
         return None
+    
+    # Check the specific markers first so the recorded reason says why JS is needed
+    if _SPA_ROOT_MARKERS.search(html):
+        return "spa_root"
+    if any("javascript" in block.lower() for block in _NOSCRIPT_BLOCK.findall(html)):
+        return "noscript_warning"
+    return "low_text"
+
+@dataclass
+class StaticFetch:
+    """Outcome of a plain HTTP fetch"""
+    html: Optional[str] = None
+    failure: Optional[str] = None  # One of the STATIC_FAILURE_* reasons when html is None
+    final_url: Optional[str] = None  # URL after redirects
+    status: Optional[int] = None  # HTTP status, when a response was received
+
+    def render_reason(self) -> Optional[str]:
+        """Why this failed fetch is worth a headless render, or None if it is not."""
+        if self.failure == STATIC_FAILURE_REFUSED:
+            return f"static_http_{self.status}"
+        if self.failure == STATIC_FAILURE_TRANSPORT:
+            return "static_fetch_failed"
+        return None
+
+async def fetch_static(url: str) -> StaticFetch:
+    """
+    Fetch a page's HTML over plain HTTP with the shared client session.
+    
+    Returns:
+        StaticFetch: The HTML and final URL on success, otherwise the failure reason
+            (one of the STATIC_FAILURE_* values)
+    """
+    try:
+        async with get_session().get(url) as response:
+            if response.status != 200:
+                logger.info(f"Static fetch got status {response.status} for {url}")
+                failure = STATIC_FAILURE_STATUS if response.status in _DEFINITIVE_STATUSES else STATIC_FAILURE_REFUSED
+                return StaticFetch(failure=failure, status=response.status)
+            content_type = response.headers.get('Content-Type', 'text/html')
+            if 'html' not in content_type:
+                logger.info(f"Static fetch got non-HTML content ({content_type}) for {url}")
+                return StaticFetch(failure=STATIC_FAILURE_NOT_HTML, status=response.status)
+            return StaticFetch(html=await response.text(), final_url=str(response.url), status=response.status)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.info(f"Static fetch failed for {url}: {e}")
+        return StaticFetch(failure=STATIC_FAILURE_TRANSPORT)
+    except Exception as e:
+        logger.error(f"Unexpected static fetch error for {url}: {e}")
+        return StaticFetch(failure=STATIC_FAILURE_TRANSPORT)
+
+async def fetch_page(url: str, mode: Optional[str] = None) -> Optional[FetchResult]:
+    """
+    Fetch a page using the configured fetch mode.
+    
+    In tiered mode the page is fetched statically first and only escalated to
+    the headless browser when needs_js_render() says the HTML is incomplete, the
+    request itself failed, or the server refused the static client (401, 403,
+    429, 5xx, ...: often a bot challenge a real browser passes). 404/410 and
+    non-HTML responses are not rendered, since a browser would get the same.
+    
+    Args:
+        url (str): The URL to fetch
+        mode (str, optional): Overrides settings.FETCH_MODE
         
-    finally:
-        if driver:
-            try:
-                logger.info("Closing browser")
-                driver.quit()
-            except Exception as e:
-                logger.warning(f"Error closing driver: {e}")
-
-async def fetch_html(url: str) -> str:
+    Returns:
+        FetchResult: The HTML and how it was fetched, or None if every tier failed
+    """
+    mode = mode or settings.FETCH_MODE
+    started = time.monotonic()
+    render_reason = None
+    
+    if mode != FETCH_MODE_RENDER:
+        static = await fetch_static(url)
+        if static.failure in (STATIC_FAILURE_STATUS, STATIC_FAILURE_NOT_HTML):
+            return None
+        render_reason = needs_js_render(static.html) if static.failure is None else static.render_reason()
+        
+        if render_reason is None or mode == FETCH_MODE_STATIC:
+            if static.html is None:
+                return None
+            return FetchResult(
+                html=static.html,
+                fetch_mode="static",
+                elapsed_ms=int((time.monotonic() - started) * 1000),
+                final_url=static.final_url
+            )
+        logger.info(f"Escalating {url} to headless render ({render_reason})")
+    
+    html_content, final_url = await fetch_html(url)
+    if not html_content:
+        return None
+    return FetchResult(
+        html=html_content,
+        fetch_mode="rendered",
+        render_reason=render_reason,
+        elapsed_ms=int((time.monotonic() - started) * 1000),
+        final_url=final_url
+    )
+
+async def fetch_html(url: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Asynchronous wrapper for fetching HTML content.
-    Uses a thread pool executor to run Selenium without blocking.
+    Uses the render thread pool to run Selenium without blocking.
     
     Args:
         url (str): The URL to fetch
         
     Returns:
-        str: The HTML content of the page, or None if there was an error
+        tuple: The HTML content of the page and the URL the browser ended up at,
+            or (None, None) if there was an error
     """
     try:
         logger.info(f"Starting async HTML fetch for: {url}")
         
         # Run the synchronous function in a thread pool
         loop = asyncio.get_event_loop()
-        html_content = await loop.run_in_executor(
-            None,
+        html_content, final_url = await loop.run_in_executor(
+            _render_executor,
             partial(_fetch_html_sync, url)
         )
         
         if html_content:
             logger.info(f"Successfully retrieved HTML for: {url}")
-            return html_content
+            return html_content, final_url
         else:
             logger.error(f"Failed to retrieve HTML for: {url}")
-            return None
+            return None, None
             
     except Exception as e:
         logger.error(f"Async wrapper error for {url}: {e}")
-        return None
+        return None, None
 
 # Example usage
 if __name__ == "__main__":
     async def main():
         test_url = "https://example.com"
-        html = await fetch_html(test_url)
-        if html:
+        result = await fetch_page(test_url)
+        if result:
+            print(f"Fetched with mode: {result.fetch_mode} ({result.render_reason})")
             print("Preview of fetched HTML:")
-            print(html[:500])  # Print first 500 characters of HTML for preview
+            print(result.html[:500])  # Print first 500 characters of HTML for preview
         else:
             print("Failed to fetch HTML")
+        await close_session()
+        shutdown_browser_pool()
 
     asyncio.run(main())
\ No newline at end of file
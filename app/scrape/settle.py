@@ -0,0 +1,101 @@
+"""
+Readiness detection for headless page renders.
+
+Instead of sleeping a fixed time after navigation, a render is considered
+settled once the document has finished loading, the network has gone idle
+(tracked from Chromium's CDP Network events in the performance log) and the DOM
+has stopped mutating. A hard cap bounds the wait for pages that never settle.
+"""
+
+import json
+import logging
+import time
+from typing import Set
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.1
+
+# Installed on every new document so mutations are tracked from the first script onwards
+MUTATION_TRACKER_JS = """
+window.__lastMutation = Date.now();
+new MutationObserver(function () { window.__lastMutation = Date.now(); })
+    .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+"""
+
+_SETTLE_STATE_JS = """
+var last = window.__lastMutation;
+return [document.readyState, last ? Date.now() - last : null];
+"""
+
+_REQUEST_STARTED = "Network.requestWillBeSent"
+_REQUEST_DONE = ("Network.loadingFinished", "Network.loadingFailed")
+
+def install_mutation_tracker(driver: WebDriver):
+    """Register the DOM mutation tracker for every page the driver loads."""
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": MUTATION_TRACKER_JS})
+
+def drain_network_events(driver: WebDriver, inflight: Set[str]):
+    """
+    Apply pending CDP Network events from the performance log to the in-flight request set.
+
+    Also used before navigation to discard events left over from the previous page.
+    """
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        # Performance logging unavailable; settle on readyState and DOM quiescence only
+        return
+
+    for entry in entries:
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (KeyError, ValueError):
+            continue
+        method = message.get("method")
+        if method == _REQUEST_STARTED:
+            inflight.add(message["params"]["requestId"])
+        elif method in _REQUEST_DONE:
+            inflight.discard(message["params"]["requestId"])
+
+def wait_for_settle(driver: WebDriver, inflight: Set[str]) -> bool:
+    """
+    Block until the current page is settled or the hard cap is reached.
+
+    Settled means readyState is 'complete', no more than RENDER_MAX_INFLIGHT_REQUESTS
+    requests are pending and the DOM has not changed, all for RENDER_QUIET_MS.
+
+    Returns:
+        bool: True if the page settled, False if the hard cap was hit
+    """
+    quiet_seconds = settings.RENDER_QUIET_MS / 1000
+    started = time.monotonic()
+    deadline = started + settings.RENDER_SETTLE_TIMEOUT
+    idle_since = None
+
+    while True:
+        drain_network_events(driver, inflight)
+        ready_state, ms_since_mutation = driver.execute_script(_SETTLE_STATE_JS)
+        now = time.monotonic()
+
+        network_idle = len(inflight) <= settings.RENDER_MAX_INFLIGHT_REQUESTS
+        if ready_state == "complete" and network_idle:
+            idle_since = idle_since or now
+            dom_quiet = ms_since_mutation is None or ms_since_mutation >= settings.RENDER_QUIET_MS
+            if dom_quiet and now - idle_since >= quiet_seconds:
+                logger.debug(f"Page settled after {now - started:.2f}s")
+                return True
+        else:
+            idle_since = None
+
+        if now >= deadline:
+            logger.info(
+                f"Settle cap of {settings.RENDER_SETTLE_TIMEOUT}s reached "
+                f"(readyState={ready_state}, inflight={len(inflight)})"
+            )
+            return False
+        time.sleep(_POLL_INTERVAL)
@@ -0,0 +1,357 @@
+"""
+Size-bounded streaming extraction for very large HTML documents.
+
+Multi-megabyte pages (infinite-scroll product grids, inlined SVG) are not
+turned into a BeautifulSoup tree. Instead the HTML is fed in chunks through
+the standard library's incremental HTMLParser, and only the fields
+extract_seo_and_content returns are kept, each under a cap:
+
+- content text stops at STREAM_MAX_CONTENT_CHARS
+- links, images and headings stop at their STREAM_MAX_* counts
+- any single value (title, meta content, heading, href, alt) is cut at
+  STREAM_MAX_FIELD_CHARS
+- at most STREAM_MAX_OPEN_ELEMENTS elements are tracked as open; deeper
+  elements take on the context of the deepest tracked one
+
+Truncated values end with TRUNCATION_MARKER and everything dropped is counted
+in the result's "overflow" section, so peak memory per page is the input
+string plus bounded output regardless of page size.
+
+Unclosed <p>, <li>, <td>, ... are closed by the start tags that imply their
+end tag, and an end tag with no open element of its name is ignored in
+constant time, so the work per tag stays bounded however sloppy the markup.
+
+The result has the same shape as extract_seo_and_content. Because there is no
+tree builder, badly mis-nested markup can attribute text slightly differently
+than a soup-based parse would.
+"""
+
+import json
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.scrape.link_classifier import get_link_classifier
+from app.scrape.main_content import CONTENT_TAGS, is_boilerplate, strip_boilerplate_enabled
+
+TRUNCATION_MARKER = "…[truncated]"
+
+HEADING_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+# Elements that never have an end tag and so never go on the open-element stack
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+})
+
+# Start tags that close a <p> left open (HTML's implied end tags)
+_CLOSES_P = frozenset({
+    "address", "article", "aside", "blockquote", "details", "dialog", "div", "dl",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4",
+    "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre",
+    "section", "table", "ul",
+})
+
+# Start tag -> open elements it closes while they are the current element
+IMPLIED_END_TAGS = {
+    **{tag: frozenset({"p"}) for tag in _CLOSES_P},
+    "li": frozenset({"p", "li"}),
+    "dt": frozenset({"p", "dt", "dd"}),
+    "dd": frozenset({"p", "dt", "dd"}),
+    "tr": frozenset({"p", "td", "th", "tr"}),
+    "td": frozenset({"p", "td", "th"}),
+    "th": frozenset({"p", "td", "th"}),
+    "option": frozenset({"option"}),
+}
+
+class _StreamingExtractor(HTMLParser):
+    """Incremental parser collecting SEO fields under fixed caps"""
+
+    def __init__(self, strip_boilerplate: bool):
+        super().__init__(convert_charrefs=True)
+        self.strip_boilerplate = strip_boilerplate
+        self.max_content_chars = settings.STREAM_MAX_CONTENT_CHARS
+        self.max_links = settings.STREAM_MAX_LINKS
+        self.max_images = settings.STREAM_MAX_IMAGES
+        self.max_headings = settings.STREAM_MAX_HEADINGS
+        self.max_field_chars = settings.STREAM_MAX_FIELD_CHARS
+        self.max_open_elements = settings.STREAM_MAX_OPEN_ELEMENTS
+
+        self.meta_tags = {"SEO": {}, "Technical": {}, "Social Media": {}}
+        self.title: Optional[str] = None
+        self.html_lang: Optional[str] = None
+        self.links: List[str] = []
+        self.headings: Dict[str, List[str]] = {f"h{i}": [] for i in range(1, 7)}
+        self.heading_count = 0
+        self.images: Dict[str, Dict[str, str]] = {}
+        self.structured_data: List[Any] = []
+        self.content_parts: List[str] = []
+        self.content_chars = 0
+
+        self.overflow = {
+            "content_chars_dropped": 0,
+            "links_dropped": 0,
+            "images_dropped": 0,
+            "headings_dropped": 0,
+            "fields_truncated": 0,
+            "elements_untracked": 0,
+        }
+
+        # Open elements as (tag, inside content container, inside boilerplate)
+        self._stack: List[tuple] = []
+        # How many elements of each name are on the stack, so stray end tags cost O(1)
+        self._open_counts: Counter = Counter()
+        self._in_content = False
+        self._in_boilerplate = False
+        # Text buffers for the element currently being captured
+        self._title_parts: Optional[List[str]] = None
+        self._heading: Optional[str] = None
+        self._heading_parts: List[str] = []
+        self._script_type: Optional[str] = None
+        self._script_parts: List[str] = []
+        self._raw_text_tag: Optional[str] = None
+
+    def _cap(self, value: str) -> str:
+        if len(value) > self.max_field_chars:
+            self.overflow["fields_truncated"] += 1
+            return value[:self.max_field_chars] + TRUNCATION_MARKER
+        return value
+
+    def close(self):
+        super().close()
+        # Elements left open at end of input still count
+        if self._heading is not None:
+            self._finish_heading()
+        if self._title_parts is not None:
+            self.title = self._cap("".join(self._title_parts).strip())
+            self._title_parts = None
+
+    # Element handling
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+
+        if tag == "meta":
+            self._handle_meta(attributes)
+        elif tag == "html" and self.html_lang is None:
+            self.html_lang = attributes.get("lang") or ""
+        elif tag == "title" and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == "a" and "href" in attributes:
+            if len(self.links) < self.max_links:
+                self.links.append(self._cap(attributes["href"] or ""))
+            else:
+                self.overflow["links_dropped"] += 1
+        elif tag == "img":
+            self._handle_image(attributes)
+        elif tag in HEADING_TAGS and self._heading is None:
+            self._heading = tag
+            self._heading_parts = []
+        elif tag in ("script", "style"):
+            self._raw_text_tag = tag
+            self._script_type = attributes.get("type") if tag == "script" else None
+            self._script_parts = []
+
+        if tag in VOID_TAGS:
+            return
+
+        implied = IMPLIED_END_TAGS.get(tag)
+        if implied:
+            while self._stack and self._stack[-1][0] in implied:
+                self._pop()
+            self._restore_context()
+
+        if len(self._stack) >= self.max_open_elements:
+            # Too deep to track; the element (and its end tag) is ignored
+            self.overflow["elements_untracked"] += 1
+            return
+
+        boilerplate = self._in_boilerplate or (
+            self.strip_boilerplate
+            and is_boilerplate(tag, (attributes.get("class") or "").split(), attributes.get("id") or "")
+        )
+        content = self._in_content or tag in CONTENT_TAGS
+        self._stack.append((tag, content, boilerplate))
+        self._open_counts[tag] += 1
+        self._in_content = content
+        self._in_boilerplate = boilerplate
+
+    def handle_startendtag(self, tag, attrs):
+        # <div/> and friends open and close in one go
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            self.title = self._cap("".join(self._title_parts).strip())
+            self._title_parts = None
+        elif tag == self._heading:
+            self._finish_heading()
+        elif tag == self._raw_text_tag:
+            self._finish_raw_text()
+
+        # Stray end tags are ignored; otherwise close up to and including the most
+        # recent matching element. Each element is popped once, so this is O(1) amortized
+        if not self._open_counts[tag]:
+            return
+        while self._pop() != tag:
+            pass
+        self._restore_context()
+
+    def _pop(self) -> str:
+        tag = self._stack.pop()[0]
+        self._open_counts[tag] -= 1
+        return tag
+
+    def _restore_context(self):
+        if self._stack:
+            _, self._in_content, self._in_boilerplate = self._stack[-1]
+        else:
+            self._in_content = self._in_boilerplate = False
+
+    def handle_data(self, data):
+        if self._raw_text_tag:
+            if self._script_type == "application/ld+json":
+                self._script_parts.append(data)
+            return
+
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._heading is not None:
+            stripped = data.strip()
+            if stripped:
+                self._heading_parts.append(stripped)
+
+        if self._in_content and not self._in_boilerplate:
+            text = data.strip()
+            if text:
+                self._add_content(text)
+
+    # Field helpers
+
+    def _handle_meta(self, attributes):
+        name = attributes.get("name") or attributes.get("property")
+        content = attributes.get("content")
+
+        if name and content:
+            content = self._cap(content)
+            if name in ["description", "keywords", "robots", "canonical"] or name.startswith("og:"):
+                self.meta_tags["SEO"][name] = content
+            elif name.startswith("twitter:"):
+                self.meta_tags["Social Media"][name] = content
+            else:
+                self.meta_tags["Technical"][name] = content
+
+        if attributes.get("charset"):
+            self.meta_tags["Technical"]["charset"] = attributes["charset"]
+
+    def _handle_image(self, attributes):
+        src = self._cap(attributes.get("src") or "")
+        if src not in self.images and len(self.images) >= self.max_images:
+            self.overflow["images_dropped"] += 1
+            return
+        alt = attributes.get("alt") or ""
+        self.images[src] = {
+            "alt": self._cap(alt) if alt else "MISSING ALT TEXT",
+            "width": attributes.get("width") or "",
+            "height": attributes.get("height") or ""
+        }
+
+    def _finish_heading(self):
+        if self.heading_count < self.max_headings:
+            self.headings[self._heading].append(self._cap("".join(self._heading_parts)))
+            self.heading_count += 1
+        else:
+            self.overflow["headings_dropped"] += 1
+        self._heading = None
+        self._heading_parts = []
+
+    def _finish_raw_text(self):
+        if self._script_type == "application/ld+json":
+            text = "".join(self._script_parts)
+            if len(text) > self.max_content_chars:
+                self.overflow["fields_truncated"] += 1
+                self.structured_data.append({"error": "JSON-LD too large"})
+            elif text:
+                try:
+                    self.structured_data.append(json.loads(text))
+                except json.JSONDecodeError:
+                    self.structured_data.append({"error": "Invalid JSON-LD"})
+        self._raw_text_tag = None
+        self._script_type = None
+        self._script_parts = []
+
+    def _add_content(self, text: str):
+        # +1 for the joining space
+        room = self.max_content_chars - self.content_chars
+        if room <= 0:
+            self.overflow["content_chars_dropped"] += len(text)
+            return
+        if len(text) + 1 > room:
+            self.overflow["content_chars_dropped"] += len(text) - room
+            text = text[:room]
+        self.content_parts.append(text)
+        self.content_chars += len(text) + 1
+
+    def result(self, input_bytes: int, base_url: Optional[str], page_url: Optional[str]) -> Dict[str, Any]:
+        content = " ".join(self.content_parts)
+        if self.overflow["content_chars_dropped"]:
+            content += TRUNCATION_MARKER
+
+        internal_links, external_links = get_link_classifier(base_url or page_url).classify(self.links, page_url)
+
+        return {
+            "title": self.title if self.title is not None else "No Title",
+            "meta": self.meta_tags,
+            "links": {
+                "internal": internal_links,
+                "external": external_links
+            },
+            "headings": self.headings,
+            "images": self.images,
+            "structured_data": self.structured_data,
+            "content": content,
+            "html_lang": self.html_lang or "",
+            "overflow": {
+                "input_bytes": input_bytes,
+                "truncated": any(self.overflow.values()),
+                **self.overflow
+            }
+        }
+
+def use_streaming_extract(html_content: str) -> bool:
+    """Whether a document is large enough to skip the soup-based extractor."""
+    threshold = settings.STREAMING_PARSE_THRESHOLD_CHARS
+    return threshold > 0 and len(html_content) >= threshold
+
+def extract_streaming(
+    html_content: str,
+    content_mode: Optional[str] = None,
+    base_url: Optional[str] = None,
+    page_url: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Extract SEO data from a large document without building a parse tree.
+
+    Args:
+        html_content (str): The HTML to analyze
+        content_mode (str, optional): "all" or "main", defaults to settings.CONTENT_EXTRACTION_MODE
+        base_url (str, optional): Scanned site, decides which links are internal
+        page_url (str, optional): URL of this page, for resolving relative links
+
+    Returns:
+        dict: extract_seo_and_content's fields plus an "overflow" section with
+            the input size and how much was dropped or truncated
+    """
+    parser = _StreamingExtractor(strip_boilerplate_enabled(content_mode))
+    chunk_size = settings.STREAM_CHUNK_SIZE
+    input_bytes = 0
+    for start in range(0, len(html_content), chunk_size):
+        chunk = html_content[start:start + chunk_size]
+        input_bytes += len(chunk.encode("utf-8", errors="replace"))
+        parser.feed(chunk)
+    parser.close()
+
+    return parser.result(input_bytes, base_url, page_url)
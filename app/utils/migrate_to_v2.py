@@ -15,6 +15,7 @@ from typing import Dict, Any, List
 
 from ..database import db
 from ..models.website import WebsiteType, ScanStatus
+from ..scrape.page_extract import PageExtract
 from ..controllers.website_v2_controller import WebsiteV2Controller
 
 logger = logging.getLogger(__name__)
@@ -299,44 +300,8 @@ class MigrationV2:
     
     async def _convert_webpage_to_page(self, user_id: str, website_id: str, snapshot_id: str, webpage: Dict) -> Dict:
         """Convert old webpage format to new page snapshot format"""
-        import hashlib
-        
-        url = webpage.get("url", "")
-        parsed_url = urlparse(url)
-        
-        # Extract SEO data
-        title = webpage.get("title", "")
-        meta = webpage.get("meta", {})
-        meta_description = meta.get("SEO", {}).get("description", "")
-        headings = webpage.get("headings", {})
-        content = webpage.get("content", "")
-        
-        # Calculate content hash
-        content_hash = hashlib.md5(content.encode()).hexdigest() if content else None
-        
-        # Extract insights
-        insights = webpage.get("insights", {
-            "Immediate Action Required": [],
-            "Needs Attention": [],
-            "Good Practice": []
-        })
-        
-        return {
-            "website_id": website_id,
-            "snapshot_id": snapshot_id,
-            "user_id": user_id,
-            "url": url,
-            "url_path": parsed_url.path,
-            "title": title,
-            "meta_description": meta_description,
-            "h1_tags": headings.get("h1", []),
-            "h2_tags": headings.get("h2", []),
-            "word_count": len(content.split()) if content else 0,
-            "seo_data": webpage,  # Store full original data
-            "insights": insights,
-            "content_hash": content_hash,
-            "scraped_at": datetime.utcnow()
-        }
+        page = PageExtract.from_document(webpage)
+        return page.to_page_snapshot(website_id, snapshot_id, user_id)
     
     async def _update_snapshot_stats(self, snapshot_id: str):
         """Update snapshot statistics based on migrated pages"""
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark and parity check for the cleaner's HTML parser backends.
+
+For every page in the corpus, each available backend must produce exactly the
+same extract_seo_and_content() output as html.parser. Throughput is then
+reported in pages/sec per backend, along with the extracted content size for
+each content extraction mode.
+
+Usage:
+  python scripts/benchmark_parsers.py                 # built-in synthetic corpus
+  python scripts/benchmark_parsers.py --corpus DIR    # every *.html file in DIR
+  python scripts/benchmark_parsers.py --repeat 20
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Dict
+
+# Add the app directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.scrape.cleaner import extract_seo_and_content
+from app.scrape.parser_backends import available_backends, HTML_PARSER
+from app.scrape.main_content import MODE_ALL, MODE_MAIN
+
+def _synthetic_page(sections: int, depth: int) -> str:
+    """A page shaped like the marketing sites we scan: nav, nested layout, meta, media."""
+    nav = "".join(f'<li><a href="/section-{i}">Section {i}</a></li>' for i in range(20))
+    blocks = []
+    for i in range(sections):
+        inner = (
+            f"<h2>Section {i}</h2>"
+            f"<p>Paragraph {i} with <strong>bold</strong> text and an "
+            f'<a href="https://partner.example.org/{i}">external link</a>.</p>'
+            f'<img src="/img/{i}.png" alt="Image {i}" width="640" height="480">'
+            f'<img src="/img/decor-{i}.png">'
+            f"<h3>Detail {i}</h3><p>More words about item {i} &amp; its features.</p>"
+        )
+        for level in range(depth):
+            inner = f'<div class="wrap-{level}">{inner}</div>'
+        blocks.append(f"<section>{inner}</section>")
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title> Benchmark page {sections}x{depth} </title>
+  <meta name="description" content="A synthetic page for parser benchmarks">
+  <meta name="keywords" content="seo, benchmark">
+  <meta property="og:title" content="Benchmark">
+  <meta name="twitter:card" content="summary">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <style>body {{ font-family: sans-serif; }}</style>
+  <script type="application/ld+json">{{"@context": "https://schema.org", "@type": "WebPage"}}</script>
+</head>
+<body>
+  <header><nav><ul>{nav}</ul></nav></header>
+  <main><h1>Benchmark page</h1><article>{"".join(blocks)}</article></main>
+  <footer><p>Footer text</p><a href="mailto:hello@example.com">Contact</a></footer>
+  <script>window.dataLayer = [];</script>
+</body>
+</html>"""
+
+def load_corpus(corpus_dir: str = None) -> Dict[str, str]:
+    if corpus_dir:
+        return {path.name: path.read_text(encoding="utf-8", errors="replace")
+                for path in sorted(Path(corpus_dir).glob("*.html"))}
+    return {
+        "small": _synthetic_page(sections=5, depth=2),
+        "medium": _synthetic_page(sections=100, depth=4),
+        "large (10k+ nodes)": _synthetic_page(sections=800, depth=6),
+    }
+
+def check_parity(corpus: Dict[str, str]) -> bool:
+    """Every backend must produce exactly the html.parser output for every page."""
+    ok = True
+    for name, html in corpus.items():
+        expected = extract_seo_and_content(html, backend=HTML_PARSER)
+        for backend in available_backends():
+            if backend == HTML_PARSER:
+                continue
+            actual = extract_seo_and_content(html, backend=backend)
+            if actual != expected:
+                ok = False
+                differing = [key for key in expected if expected.get(key) != actual.get(key)]
+                print(f"  ❌ {backend} differs from {HTML_PARSER} on '{name}': {differing}")
+    return ok
+
+def benchmark(corpus: Dict[str, str], repeat: int):
+    for name, html in corpus.items():
+        print(f"\n📄 {name} ({len(html) / 1024:.0f} KB)")
+        for backend in available_backends():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                extract_seo_and_content(html, backend=backend)
+            elapsed = time.perf_counter() - started
+            print(f"  {backend:<12} {repeat / elapsed:8.1f} pages/sec")
+
+def report_content_size(corpus: Dict[str, str]):
+    for name, html in corpus.items():
+        sizes = []
+        for mode in (MODE_ALL, MODE_MAIN):
+            result = extract_seo_and_content(html, content_mode=mode)
+            sizes.append(f"{mode}: {len(result['content']) / 1024:.1f} KB")
+        print(f"  {name:<20} {len(html) / 1024:7.0f} KB html -> {', '.join(sizes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cleaner parser backends")
+    parser.add_argument("--corpus", help="Directory of .html fixture pages")
+    parser.add_argument("--repeat", type=int, default=10, help="Parses per page and backend")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f"Backends: {', '.join(available_backends())}")
+
+    print("\n🔍 Parity check")
+    if check_parity(corpus):
+        print("  ✅ All backends produce identical output")
+
+    print("\n📏 Content size")
+    report_content_size(corpus)
+
+    print("\n⏱️  Throughput")
+    benchmark(corpus, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for handing cleaner results to the scan pipeline.
+
+process_html used to return json.dumps(seo_data, indent=4) and complete_scan
+immediately json.loads'ed it back. This measures the CPU that round-trip cost
+per page against handing over the dict directly.
+
+Usage:
+  python scripts/benchmark_result_handoff.py
+  python scripts/benchmark_result_handoff.py --corpus DIR --repeat 50
+"""
+
+import sys
+import json
+import time
+import argparse
+import logging
+from pathlib import Path
+
+# Add the app directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.scrape.cleaner import extract_seo_and_content
+from benchmark_parsers import load_corpus
+
+def _json_round_trip(seo_data):
+    return json.loads(json.dumps(seo_data, indent=4, ensure_ascii=False))
+
+def _direct(seo_data):
+    return seo_data
+
+def _time_per_call(func, seo_data, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(seo_data)
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the cleaner -> scan result handoff")
+    parser.add_argument("--corpus", help="Directory of .html fixture pages")
+    parser.add_argument("--repeat", type=int, default=20, help="Handoffs per page")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    corpus = load_corpus(args.corpus)
+
+    print(f"{'page':<22} {'json round-trip':>16} {'direct':>10} {'saved/page':>12}")
+    for name, html in corpus.items():
+        seo_data = extract_seo_and_content(html)
+        round_trip = _time_per_call(_json_round_trip, seo_data, args.repeat)
+        direct = _time_per_call(_direct, seo_data, args.repeat)
+        print(
+            f"{name:<22} {round_trip * 1000:13.3f} ms {direct * 1000:7.3f} ms "
+            f"{(round_trip - direct) * 1000:9.3f} ms"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+import os
+from pathlib import Path
+
+# app.config and the Supabase clients validate these at import time; tests never connect to them
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "seo_scraper_test")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+os.environ.setdefault("POSTGRES_URI", "postgresql://localhost/seo_scraper_test")
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
@@ -0,0 +1,55 @@
+import asyncio
+
+from app.controllers.v2.comparison_controller import _merge_join_by_url
+
+class _Cursor:
+    """Async iterator over pages, like a Motor cursor"""
+
+    def __init__(self, pages):
+        self._pages = iter(pages)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._pages)
+        except StopIteration:
+            raise StopAsyncIteration
+
+def _join(baseline, current):
+    async def run():
+        return [
+            (url, baseline_page and baseline_page["id"], current_page and current_page["id"])
+            async for url, baseline_page, current_page in _merge_join_by_url(_Cursor(baseline), _Cursor(current))
+        ]
+    return asyncio.run(run())
+
+def _pages(prefix, urls):
+    return [{"id": f"{prefix}{index}", "url": url} for index, url in enumerate(urls)]
+
+def test_pairs_matching_urls_and_reports_one_sided_pages():
+    baseline = _pages("b", ["/a", "/b", "/d"])
+    current = _pages("c", ["/b", "/c", "/d", "/e"])
+    assert _join(baseline, current) == [
+        ("/a", "b0", None),
+        ("/b", "b1", "c0"),
+        ("/c", None, "c1"),
+        ("/d", "b2", "c2"),
+        ("/e", None, "c3"),
+    ]
+
+def test_empty_sides():
+    assert _join([], []) == []
+    assert _join(_pages("b", ["/a"]), []) == [("/a", "b0", None)]
+    assert _join([], _pages("c", ["/a"])) == [("/a", None, "c0")]
+
+def test_duplicate_urls_yield_first_page_in_cursor_order():
+    baseline = _pages("b", ["/a", "/a", "/b"])
+    current = _pages("c", ["/a", "/b", "/b"])
+    assert _join(baseline, current) == [("/a", "b0", "c0"), ("/b", "b2", "c1")]
+
+def test_missing_url_sorts_first_as_empty_string():
+    baseline = [{"id": "b0"}, {"id": "b1", "url": "/a"}]
+    current = [{"id": "c0", "url": None}, {"id": "c1", "url": "/a"}]
+    assert _join(baseline, current) == [("", "b0", "c0"), ("/a", "b1", "c1")]
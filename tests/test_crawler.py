@@ -0,0 +1,59 @@
+import asyncio
+
+from app.scrape.crawler import CrawlFrontier
+
+def _drain(frontier, pages):
+    """Visit every URL the frontier hands out, reporting the links in pages[url]."""
+    async def run():
+        visited = []
+        async for url, depth in frontier:
+            visited.append(url)
+            final_url, links = pages.get(url, (url, []))
+            frontier.add_links(final_url, links, depth)
+            frontier.page_done()
+        return visited
+    return asyncio.run(run())
+
+def test_follows_links_after_redirect_to_www_host():
+    pages = {
+        "https://example.com/": ("https://www.example.com/", ["/about", "https://www.example.com/blog"]),
+        "https://www.example.com/about": ("https://www.example.com/about", ["/", "https://other.org/"]),
+    }
+    frontier = CrawlFrontier("https://example.com", max_pages=10, max_depth=3)
+    assert _drain(frontier, pages) == [
+        "https://example.com/",
+        "https://www.example.com/about",
+        "https://www.example.com/blog",
+    ]
+
+def test_accepts_host_the_start_page_redirected_to():
+    pages = {"https://example.com/": ("https://example.org/home", ["/pricing", "https://example.net/x"])}
+    frontier = CrawlFrontier("https://example.com", max_pages=10, max_depth=3)
+    assert _drain(frontier, pages) == ["https://example.com/", "https://example.org/pricing"]
+
+def test_does_not_crawl_subdomains():
+    pages = {
+        "https://www.example.com/": ("https://www.example.com/", [
+            "/pricing",
+            "https://example.com/about",
+            "https://app.example.com/login",
+            "https://docs.example.com/",
+            "https://shop.example.com/cart",
+        ]),
+    }
+    frontier = CrawlFrontier("https://www.example.com", max_pages=10, max_depth=3)
+    assert _drain(frontier, pages) == [
+        "https://www.example.com/",
+        "https://www.example.com/pricing",
+        "https://example.com/about",
+    ]
+
+def test_respects_max_depth_and_max_pages():
+    pages = {
+        "https://example.com/": ("https://example.com/", ["/a", "/b", "/c"]),
+        "https://example.com/a": ("https://example.com/a", ["/a/deeper"]),
+    }
+    assert _drain(CrawlFrontier("https://example.com", max_pages=10, max_depth=1), pages) == [
+        "https://example.com/", "https://example.com/a", "https://example.com/b", "https://example.com/c"
+    ]
+    assert len(_drain(CrawlFrontier("https://example.com", max_pages=2, max_depth=3), pages)) == 2
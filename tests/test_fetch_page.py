@@ -0,0 +1,84 @@
+import asyncio
+import http.server
+import threading
+
+import pytest
+
+from app.scrape import scraper
+from app.scrape.http_client import close_session
+
+ARTICLE = "<html><body><p>" + "Plenty of server-rendered article text. " * 20 + "</p></body></html>"
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    # Path "/status/<code>" answers with that status; "/pdf" with a PDF; anything else with an article
+    def do_GET(self):
+        if self.path.startswith("/status/"):
+            self.send_response(int(self.path.rsplit("/", 1)[1]))
+            self.send_header("Content-Type", "text/html")
+            body = b"<html><body>Checking your browser...</body></html>"
+        elif self.path == "/pdf":
+            self.send_response(200)
+            self.send_header("Content-Type", "application/pdf")
+            body = b"%PDF-1.4"
+        else:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            body = ARTICLE.encode()
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def site():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Stand-in for the headless browser, recording which URLs were rendered."""
+    urls = []
+
+    async def fake_fetch_html(url):
+        urls.append(url)
+        return "<html><body><p>Rendered</p></body></html>", url
+
+    monkeypatch.setattr(scraper, "fetch_html", fake_fetch_html)
+    return urls
+
+def _fetch(url):
+    async def run():
+        try:
+            return await scraper.fetch_page(url, mode=scraper.FETCH_MODE_TIERED)
+        finally:
+            await close_session()
+    return asyncio.run(run())
+
+def test_html_page_is_used_statically(site, rendered):
+    result = _fetch(f"{site}/article")
+    assert result.fetch_mode == "static"
+    assert rendered == []
+
+@pytest.mark.parametrize("path", ["/status/404", "/status/410", "/pdf"])
+def test_missing_and_non_html_pages_are_skipped_without_a_render(site, rendered, path):
+    assert _fetch(f"{site}{path}") is None
+    assert rendered == []
+
+@pytest.mark.parametrize("status", [401, 403, 429, 503])
+def test_refused_static_fetch_escalates_to_a_render(site, rendered, status):
+    result = _fetch(f"{site}/status/{status}")
+    assert result.fetch_mode == "rendered"
+    assert result.render_reason == f"static_http_{status}"
+    assert rendered == [f"{site}/status/{status}"]
+
+def test_transport_error_escalates_to_a_render(rendered):
+    # Nothing listens on port 9 locally
+    result = _fetch("http://127.0.0.1:9/page")
+    assert result.fetch_mode == "rendered"
+    assert result.render_reason == "static_fetch_failed"
@@ -0,0 +1,25 @@
+import pytest
+
+from app.scrape.cleaner import extract_seo_and_content
+from app.scrape.streaming_extract import extract_streaming
+
+# WordPress-style layout classes on the page containers, real chrome inside them
+PAGE = (
+    '<html class="menu-open"><body class="home has-sidebar">'
+    '<nav><div>Home About</div></nav>'
+    '<main id="main-header-offset"><article class="post share-enabled">'
+    '<p>Real text</p><div class="sidebar-widget">Popular posts</div><p>More text</p>'
+    '</article></main>'
+    '<div id="cookie-banner">Accept cookies</div>'
+    '</body></html>'
+)
+
+@pytest.mark.parametrize("extract", [extract_seo_and_content, extract_streaming])
+def test_layout_classes_on_page_containers_keep_the_content(extract):
+    result = extract(PAGE, content_mode="main")
+    assert result["content"] == "Real text More text"
+
+@pytest.mark.parametrize("extract", [extract_seo_and_content, extract_streaming])
+def test_all_mode_keeps_the_chrome(extract):
+    result = extract(PAGE, content_mode="all")
+    assert result["content"] == "Home About Real text Popular posts More text Accept cookies"
@@ -0,0 +1,33 @@
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.config import settings
+from app.scrape import parse_pool
+
+@pytest.fixture
+def process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "PARSE_EXECUTOR", "process")
+    monkeypatch.setattr(settings, "PARSE_PROCESS_WORKERS", 1)
+    yield
+    parse_pool.shutdown_parse_pool()
+
+def test_pool_is_replaced_after_a_worker_dies(process_pool):
+    async def run():
+        first_pid = await parse_pool.run_parse(os.getpid)
+        broken = parse_pool._pool
+
+        # A worker dying (e.g. out of memory) fails the parse it was running...
+        with pytest.raises(BrokenProcessPool):
+            await parse_pool.run_parse(os._exit, 1)
+        assert parse_pool._pool is None
+
+        # ...but not every parse after it
+        second_pid = await parse_pool.run_parse(os.getpid)
+        assert parse_pool._pool is not None and parse_pool._pool is not broken
+        return first_pid, second_pid
+
+    first_pid, second_pid = asyncio.run(run())
+    assert first_pid != second_pid != os.getpid()
@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import http.server
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.scrape import scraper
+from app.scrape.browser_pool import BrowserPool
+
+_CHROMEDRIVER_PATHS = ("/usr/bin/chromedriver", "/usr/local/bin/chromedriver", "/snap/bin/chromium.chromedriver")
+HAS_CHROMEDRIVER = any(os.path.exists(path) for path in _CHROMEDRIVER_PATHS) or shutil.which("chromedriver")
+HAS_CHROMIUM = any(shutil.which(name) for name in ("chromium", "chromium-browser", "google-chrome"))
+
+pytestmark = pytest.mark.skipif(
+    not (HAS_CHROMEDRIVER and HAS_CHROMIUM), reason="chromium/chromedriver not installed"
+)
+
+POOL_SIZE = 3
+PAGE_COUNT = 9
+
+@pytest.fixture
+def local_site(tmp_path):
+    """A local http.server serving pages whose marker text only exists after JS runs."""
+    for index in range(PAGE_COUNT):
+        (tmp_path / f"page{index}.html").write_text(
+            f"<html><head><title>Page {index}</title></head><body><div id='out'></div>"
+            f"<script>document.getElementById('out').textContent = 'rendered-{index}';</script>"
+            f"</body></html>"
+        )
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=str(tmp_path))
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def render_pool(monkeypatch):
+    """A dedicated browser pool and render executor, recording every driver started."""
+    drivers = []
+
+    def create_driver():
+        driver = scraper._create_driver()
+        drivers.append(driver)
+        return driver
+
+    pool = BrowserPool(create_driver, scraper._close_driver, size=POOL_SIZE, max_pages_per_browser=50)
+    executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="test-render")
+    monkeypatch.setattr(scraper, "_browser_pool", pool)
+    monkeypatch.setattr(scraper, "_render_executor", executor)
+    yield pool, drivers
+    executor.shutdown(wait=True)
+    pool.close()
+
+def test_concurrent_renders_use_isolated_browsers(local_site, render_pool):
+    async def render_all():
+        urls = [f"{local_site}/page{index}.html" for index in range(PAGE_COUNT)]
+        return await asyncio.gather(*(scraper.fetch_html(url) for url in urls))
+
+    results = asyncio.run(render_all())
+
+    for index, (html, final_url) in enumerate(results):
+        assert html is not None, f"page{index} failed to render"
+        assert f"rendered-{index}" in html
+        assert final_url.endswith(f"/page{index}.html")
+
+    # Several browsers ran side by side, each with its own profile and DevTools port
+    pool, drivers = render_pool
+    assert 1 < len(drivers) <= POOL_SIZE
+    assert len({driver.profile_dir for driver in drivers}) == len(drivers)
+    debugger_addresses = {driver.capabilities["goog:chromeOptions"]["debuggerAddress"] for driver in drivers}
+    assert len(debugger_addresses) == len(drivers)
+
+    # Closing the pool quits every browser and removes its profile
+    pool.close()
+    assert not any(os.path.exists(driver.profile_dir) for driver in drivers)
@@ -0,0 +1,22 @@
+import pytest
+
+from app.config import settings
+from app.scrape import scraper
+from app.scrape.resource_blocking import build_blocked_url_patterns
+
+IMAGES_OFF = "--blink-settings=imagesEnabled=false"
+
+def _blink_blocks_images() -> bool:
+    return IMAGES_OFF in scraper._build_chrome_options("/tmp/profile", 9222).arguments
+
+@pytest.mark.parametrize("setting, blocked", [
+    ("image,font", True),
+    (" Image , media", True),
+    ("font,media", False),
+    # Not a resource type: neither the CDP patterns nor the Blink flag block images
+    ("images,background-image", False),
+])
+def test_blink_flag_and_cdp_patterns_agree_on_images(monkeypatch, setting, blocked):
+    monkeypatch.setattr(settings, "RENDER_BLOCKED_RESOURCE_TYPES", setting)
+    assert ("*.png" in build_blocked_url_patterns()) is blocked
+    assert _blink_blocks_images() is blocked
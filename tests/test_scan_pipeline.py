@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from app.config import settings
+from app.scrape import runScrape
+from app.scrape.pipeline import Stage, run_pipeline
+from app.scrape.scraper import FetchResult
+
+SITE = "https://example.com"
+
+# Path -> links on the page; the home page links to every failure mode
+PAGES = {
+    "/": ["/about", "/blog", "/missing", "/fetch-error", "/parse-error"],
+    "/about": ["/", "/team"],
+    "/blog": ["/about"],
+    "/team": [],
+    "/parse-error": [],
+}
+
+def _html(path):
+    links = "".join(f'<a href="{link}">{link}</a>' for link in PAGES[path])
+    return f"<html><head><title>{path}</title></head><body><p>Page {path}</p>{links}</body></html>"
+
+async def _fetch_page(url):
+    path = url[len(SITE):] or "/"
+    if path == "/fetch-error":
+        raise RuntimeError("connection reset")
+    if path not in PAGES:
+        return None
+    return FetchResult(html=_html(path), fetch_mode="static", final_url=url)
+
+class _Collection:
+    def __init__(self):
+        self.upserted = []
+
+    async def bulk_write(self, operations, ordered=False):
+        self.upserted.extend(operation._filter["url"] for operation in operations)
+
+@pytest.fixture
+def scan(monkeypatch):
+    """Run complete_scan against the stub site, with the given parse batch dispatcher."""
+    monkeypatch.setattr(settings, "SCAN_HOST_MIN_INTERVAL", 0)
+    monkeypatch.setattr(settings, "SCAN_PARSE_BATCH_SIZE", 1)
+    monkeypatch.setattr(runScrape, "fetch_page", _fetch_page)
+    collection = _Collection()
+    monkeypatch.setattr(runScrape, "collection", collection)
+
+    real_process_html_batch = runScrape.process_html_batch
+
+    async def process_html_batch(documents):
+        if any(page_url.endswith("/parse-error") for _, _, page_url in documents):
+            raise RuntimeError("parse worker died")
+        return await real_process_html_batch(documents)
+
+    monkeypatch.setattr(runScrape, "process_html_batch", process_html_batch)
+
+    def run():
+        statuses = []
+
+        async def status_callback(status):
+            statuses.append(status)
+
+        # A missed page_done() would hang the scan forever instead of failing
+        result = asyncio.run(asyncio.wait_for(
+            runScrape.complete_scan("analysis", SITE, status_callback=status_callback),
+            timeout=10
+        ))
+        return result, statuses[-1], collection.upserted
+
+    return run
+
+def test_scan_finishes_and_counts_every_page_once(scan):
+    result, status, upserted = scan()
+
+    assert result["success"] is True
+    assert status["scan_status"] == "completed"
+    # Every discovered page is either scanned or failed, none twice
+    assert status["total_pages"] == 7
+    assert status["pages_scanned"] == 4
+    assert status["pages_failed"] == 3
+    assert sorted(upserted) == sorted(f"{SITE}{path}" for path in ("/", "/about", "/blog", "/team"))
+
+def test_pipeline_finishes_when_handlers_raise():
+    handled = []
+
+    async def source():
+        for item in range(20):
+            yield item
+
+    async def flaky(item):
+        if item % 3 == 0:
+            raise RuntimeError("boom")
+        return None if item % 3 == 1 else item
+
+    async def flaky_batch(items):
+        if 5 in items:
+            raise RuntimeError("batch boom")
+        return items
+
+    async def sink(item):
+        handled.append(item)
+
+    asyncio.run(asyncio.wait_for(run_pipeline(
+        source(),
+        [
+            Stage("first", flaky, workers=3),
+            Stage("batch", flaky_batch, workers=2, batch_size=4),
+            Stage("last", sink)
+        ],
+        queue_size=2
+    ), timeout=5))
+
+    survivors = [item for item in range(20) if item % 3 == 2]
+    assert set(handled) <= set(survivors)
+    assert set(survivors) - set(handled) <= {5}
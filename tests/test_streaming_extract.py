@@ -0,0 +1,53 @@
+import time
+
+from app.config import settings
+from app.scrape.streaming_extract import _StreamingExtractor, extract_streaming
+
+REPEATS = 20_000
+
+def _feed(html: str) -> _StreamingExtractor:
+    parser = _StreamingExtractor(strip_boilerplate=False)
+    max_depth = 0
+    for start in range(0, len(html), settings.STREAM_CHUNK_SIZE):
+        parser.feed(html[start:start + settings.STREAM_CHUNK_SIZE])
+        max_depth = max(max_depth, len(parser._stack))
+    parser.close()
+    parser.max_depth_seen = max_depth
+    return parser
+
+def test_unclosed_list_items_and_stray_end_tags_stay_linear():
+    html = "<html><body><ul>" + "<li><p>item" * REPEATS + "</span>" * REPEATS + "</ul></body></html>"
+
+    started = time.perf_counter()
+    parser = _feed(html)
+    elapsed = time.perf_counter() - started
+
+    # Quadratic end-tag matching took close to a minute on this input
+    assert elapsed < 5
+    # <li> closes the previous <li> and <p>, so the list never nests
+    assert parser.max_depth_seen <= 5
+    assert parser.content_parts[:2] == ["item", "item"]
+
+def test_open_element_depth_is_capped():
+    html = "<div>" + "<span>deep" * REPEATS + "</div><p>after</p>"
+
+    started = time.perf_counter()
+    parser = _feed(html)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 5
+    assert parser.max_depth_seen <= settings.STREAM_MAX_OPEN_ELEMENTS
+    assert parser.overflow["elements_untracked"] == REPEATS + 1 - settings.STREAM_MAX_OPEN_ELEMENTS
+    # The closing </div> still unwinds everything tracked under it
+    assert parser._stack == []
+    assert parser.content_parts[-1] == "after"
+
+def test_implied_end_tags_keep_text_attribution():
+    html = (
+        "<table><tr><td>cell one<td>cell two<tr><td>cell three</table>"
+        "<p>first<p>second<div>block</div>"
+    )
+    result = extract_streaming(html, content_mode="all")
+
+    assert result["content"] == "first second block"
+    assert result["overflow"]["elements_untracked"] == 0